@@ -0,0 +1,61 @@
+"""
+Микробенчмарк накладных расходов CRUDManagerSQL без обращения к БД.
+
+Сравнивает прежний путь (inspect(model) на каждый вызов и сборка запроса заново)
+с реестром models_meta и заранее собранными запросами.
+
+Запуск: python -m benchmarks.crud_overhead
+"""
+import timeit
+
+from sqlalchemy import inspect, select
+
+from database.models import Songs, models_meta
+
+NUMBER = 20_000
+
+BODY = {
+    'title': 'Ангел света',
+    'title_search': 'ангелсвета',
+    'text': 'А мы не ангелы парень, нет мы не ангелы',
+    'category': 1
+}
+
+
+def legacy_call(row_id: int):
+    keys = inspect(Songs).columns.keys()
+    error_keys = [key for key in BODY if key not in keys]
+
+    primary_key = getattr(Songs, inspect(Songs).primary_key[0].key)
+    query = select(Songs).filter(primary_key == row_id)
+
+    return error_keys, query
+
+
+def registry_call(row_id: int):
+    model_meta = models_meta[Songs]
+    error_keys = [key for key in BODY if key not in model_meta.column_keys]
+
+    return error_keys, model_meta.select_by_id, {'pk_value': row_id}
+
+
+def legacy_to_dict(song: Songs):
+    return {c.key: getattr(song, c.key) for c in inspect(song).mapper.column_attrs}
+
+
+def main():
+    song = Songs(id=1, **BODY)
+
+    results = {
+        'check_body + запрос (inspect)': timeit.timeit(lambda: legacy_call(1), number=NUMBER),
+        'check_body + запрос (models_meta)': timeit.timeit(lambda: registry_call(1), number=NUMBER),
+        'to_dict (inspect)': timeit.timeit(lambda: legacy_to_dict(song), number=NUMBER),
+        'to_dict (models_meta)': timeit.timeit(song.to_dict, number=NUMBER),
+    }
+
+    for title, seconds in results.items():
+        print(f'{title:<40} {seconds / NUMBER * 1_000_000:8.2f} мкс/вызов')
+
+
+if __name__ == '__main__':
+    main()
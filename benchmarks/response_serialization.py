@@ -0,0 +1,61 @@
+"""
+Микробенчмарк сериализации списка песен без обращения к БД.
+
+Сравнивает стандартный путь FastAPI (проверка по response_model, jsonable_encoder и json.dumps
+в JSONResponse) с FastResponseData (заранее собранный TypeAdapter и orjson).
+
+Запуск: python -m benchmarks.response_serialization
+"""
+import asyncio
+import timeit
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+from database.models import Songs
+from schemas.responses import FastResponseData, Meta, ResponseData
+from schemas.song import SongResponse, song_list_adapter
+
+ROWS = 1000
+NUMBER = 50
+
+SONG_TEXT = 'А мы не ангелы парень, нет мы не ангелы, там на пожарной лестнице\n' * 20
+
+
+def main():
+    songs = [
+        Songs(id=i, title=f'Песня {i}', title_search=f'песня{i}', text=SONG_TEXT, category=i % 10)
+        for i in range(ROWS)
+    ]
+    response_field = create_response_field(name='response', type_=ResponseData[SongResponse])
+
+    async def fastapi_response():
+        content = await serialize_response(
+            field=response_field,
+            response_content=ResponseData(data=songs, meta=Meta(total=len(songs)))
+        )
+
+        return JSONResponse(content).body
+
+    def fast_response():
+        return FastResponseData(data=songs, adapter=song_list_adapter).body
+
+    loop = asyncio.new_event_loop()
+
+    results = {
+        'FastAPI (response_model + json)': timeit.timeit(
+            lambda: loop.run_until_complete(fastapi_response()), number=NUMBER
+        ),
+        'FastResponseData (TypeAdapter + orjson)': timeit.timeit(fast_response, number=NUMBER),
+    }
+
+    loop.close()
+
+    print(f'Размер ответа: {len(fast_response()) / 1024:.0f} КБ')
+    for title, seconds in results.items():
+        print(f'{title:<45} {seconds / NUMBER * 1000:8.2f} мс на {ROWS} песен')
+
+
+if __name__ == '__main__':
+    main()
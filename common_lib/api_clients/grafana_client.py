@@ -6,6 +6,7 @@ from .url_factory import grafana_url_f
 from config import GRAFANA_TOKEN
 from schemas.dashboard import Dashboard, Visualization
 from .enums import RenderType
+from common_lib.single_flight import single_flight
 
 class GrafanaClient(ApiClientBase):
     def __init__(
@@ -15,6 +16,7 @@ class GrafanaClient(ApiClientBase):
         super().__init__(token=bearer_token)
 
 
+    @single_flight('grafana.get_dashboards')
     async def get_dashboards(
             self,
     ) -> List[Dashboard]:
@@ -25,6 +27,7 @@ class GrafanaClient(ApiClientBase):
 
         return dashboards
 
+    @single_flight('grafana.get_dashboard')
     async def get_dashboard(
             self,
             dashboard_uid: str
@@ -43,6 +46,7 @@ class GrafanaClient(ApiClientBase):
             )
 
 
+    @single_flight('grafana.get_visualizations')
     async def get_visualizations(
             self,
             dashboard_uid: str
@@ -76,6 +80,7 @@ class GrafanaClient(ApiClientBase):
         return visualisation
 
 
+    @single_flight('grafana.get_dashboard_to_img')
     async def get_dashboard_to_img(
             self,
             dashboard_uid: str
@@ -103,6 +108,7 @@ class GrafanaClient(ApiClientBase):
             'dashboard': dashboard_data
         }
 
+    @single_flight('grafana.get_visualizations_to_img')
     async def get_visualizations_to_img(
             self,
             dashboard_uid: str,
@@ -0,0 +1,711 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+from fastapi import BackgroundTasks, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.responses import Response
+
+import config
+from common_lib.logger import logger
+from common_lib.single_flight import flight
+from database.models import Base
+from database.table_versions import get_tables_version
+
+
+class CacheBackendInterface(ABC):
+    """
+    Интерфейс кэша с инвалидацией по тегам.
+    В качестве тегов используются имена таблиц, поэтому записи сбрасываются
+    при любой записи в таблицу через CRUDManagerSQL.
+    """
+
+    @abstractmethod
+    async def get(
+            self,
+            key: str
+    ) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str] = ()
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def invalidate(
+            self,
+            *tags: str
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def get_generation(
+            self,
+            tags: Iterable[str]
+    ) -> Any:
+        """
+        Поколение тегов: меняется при каждой инвалидации тега.
+        Значение непрозрачное и передается обратно в set_if_unchanged
+        """
+        pass
+
+    @abstractmethod
+    async def set_if_unchanged(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str],
+            generation: Any
+    ) -> None:
+        """
+        Сохраняет значение, только если теги не инвалидировались после get_generation.
+        Значение, прочитанное из БД до записи, не попадет в кэш после инвалидации этой записи
+        """
+        pass
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackendInterface):
+    """
+    Кэш в памяти процесса без ограничений по размеру и времени жизни.
+    Используется для небольших объектов (деревья категорий и глав) и как подмена кэша в тестах
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._generations: Dict[str, int] = defaultdict(int)
+
+    async def get(
+            self,
+            key: str
+    ) -> Optional[Any]:
+        return self._data.get(key)
+
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str] = ()
+    ) -> None:
+        self._data[key] = value
+
+        for tag in tags:
+            self._tags[tag].add(key)
+
+    async def invalidate(
+            self,
+            *tags: str
+    ) -> None:
+        for tag in tags:
+            self._generations[tag] += 1
+
+            for key in self._tags.pop(tag, set()):
+                self._data.pop(key, None)
+
+    async def get_generation(
+            self,
+            tags: Iterable[str]
+    ) -> Dict[str, int]:
+        return {tag: self._generations[tag] for tag in tags}
+
+    async def set_if_unchanged(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str],
+            generation: Dict[str, int]
+    ) -> None:
+        tags = tuple(tags)
+
+        if all(self._generations[tag] == generation.get(tag) for tag in tags):
+            await self.set(key, value, tags=tags)
+
+    async def clear(self) -> None:
+        for tag in self._generations:
+            self._generations[tag] += 1
+
+        self._data.clear()
+        self._tags.clear()
+
+
+class LocalCache(CacheBackendInterface):
+    """
+    Кэш в памяти процесса с вытеснением давно не используемых записей (LRU) и временем жизни записи
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            ttl_seconds: float
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]] = OrderedDict()
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._generations: Dict[str, int] = defaultdict(int)
+        # Меняется при полной очистке, которая сбрасывает записи всех тегов
+        self._epoch = 0
+
+    def remove(
+            self,
+            key: str
+    ) -> None:
+        if (item := self._data.pop(key, None)) is None:
+            return
+
+        for tag in item[2]:
+            self._tags[tag].discard(key)
+
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    async def get(
+            self,
+            key: str
+    ) -> Optional[Any]:
+        if (item := self._data.get(key)) is None:
+            return None
+
+        expires_at, value, _ = item
+
+        if expires_at < time.monotonic():
+            self.remove(key)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str] = ()
+    ) -> None:
+        self.remove(key)
+
+        tags = tuple(tags)
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value, tags)
+
+        for tag in tags:
+            self._tags[tag].add(key)
+
+        while len(self._data) > self.max_size:
+            self.remove(next(iter(self._data)))
+
+    async def invalidate(
+            self,
+            *tags: str
+    ) -> None:
+        for tag in tags:
+            self._generations[tag] += 1
+
+            for key in list(self._tags.get(tag, ())):
+                self.remove(key)
+
+    async def clear(self) -> None:
+        self._epoch += 1
+        self._data.clear()
+        self._tags.clear()
+
+    async def get_generation(
+            self,
+            tags: Iterable[str]
+    ) -> Tuple[int, Dict[str, int]]:
+        return self._epoch, {tag: self._generations[tag] for tag in tags}
+
+    async def set_if_unchanged(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str],
+            generation: Tuple[int, Dict[str, int]]
+    ) -> None:
+        epoch, generations = generation
+        tags = tuple(tags)
+
+        if epoch == self._epoch and all(self._generations[tag] == generations.get(tag) for tag in tags):
+            await self.set(key, value, tags=tags)
+
+
+class RedisCache(CacheBackendInterface):
+    """
+    Общий для всех процессов кэш в Redis.
+    Ключи тега хранятся в множестве Redis, при инвалидации удаляются ключи и само множество
+    и увеличивается счетчик поколения тега.
+    Ошибки Redis пишутся в лог и не прерывают обработку запроса
+    """
+
+    # KEYS: ключ значения, ключи поколений тегов, ключи множеств тегов.
+    # ARGV: значение, время жизни, количество тегов, ожидаемые поколения тегов
+    SET_IF_UNCHANGED_SCRIPT = '''
+        local count = tonumber(ARGV[3])
+
+        for i = 1, count do
+            if tonumber(redis.call('GET', KEYS[1 + i]) or '0') ~= tonumber(ARGV[3 + i]) then
+                return 0
+            end
+        end
+
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+
+        for i = 1, count do
+            redis.call('SADD', KEYS[1 + count + i], KEYS[1])
+            redis.call('EXPIRE', KEYS[1 + count + i], ARGV[2])
+        end
+
+        return 1
+    '''
+
+    def __init__(
+            self,
+            client: aioredis.Redis,
+            ttl_seconds: int,
+            prefix: str = 'cache'
+    ):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._set_if_unchanged = client.register_script(self.SET_IF_UNCHANGED_SCRIPT)
+
+    def get_tag_key(
+            self,
+            tag: str
+    ) -> str:
+        return f'{self.prefix}:tag:{tag}'
+
+    def get_generation_key(
+            self,
+            tag: str
+    ) -> str:
+        return f'{self.prefix}:generation:{tag}'
+
+    async def get(
+            self,
+            key: str
+    ) -> Optional[bytes]:
+        try:
+            return await self.client.get(f'{self.prefix}:{key}')
+
+        except RedisError as e:
+            logger.error(f'Ошибка чтения из Redis {e}')
+            return None
+
+    async def set(
+            self,
+            key: str,
+            value: bytes,
+            tags: Iterable[str] = ()
+    ) -> None:
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(f'{self.prefix}:{key}', value, ex=self.ttl_seconds)
+
+                # Множество тега живет не меньше своих ключей, чтобы не копить в нем истекшие ключи
+                for tag in tags:
+                    pipe.sadd(self.get_tag_key(tag), f'{self.prefix}:{key}')
+                    pipe.expire(self.get_tag_key(tag), self.ttl_seconds)
+
+                await pipe.execute()
+
+        except RedisError as e:
+            logger.error(f'Ошибка записи в Redis {e}')
+
+    async def invalidate(
+            self,
+            *tags: str
+    ) -> None:
+        try:
+            for tag in tags:
+                await self.client.incr(self.get_generation_key(tag))
+                keys = await self.client.smembers(self.get_tag_key(tag))
+                await self.client.delete(self.get_tag_key(tag), *keys)
+
+        except RedisError as e:
+            logger.error(f'Ошибка инвалидации кэша в Redis {e}')
+
+    async def get_generation(
+            self,
+            tags: Iterable[str]
+    ) -> Optional[Dict[str, int]]:
+        tags = tuple(tags)
+
+        try:
+            values = await self.client.mget([self.get_generation_key(tag) for tag in tags]) if tags else []
+
+        except RedisError as e:
+            logger.error(f'Ошибка чтения поколения тегов из Redis {e}')
+            return None
+
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    async def set_if_unchanged(
+            self,
+            key: str,
+            value: bytes,
+            tags: Iterable[str],
+            generation: Optional[Dict[str, int]]
+    ) -> None:
+        # Поколение неизвестно (Redis был недоступен) - значение не сохраняется
+        if generation is None:
+            return
+
+        tags = tuple(tags)
+
+        try:
+            await self._set_if_unchanged(
+                keys=[
+                    f'{self.prefix}:{key}',
+                    *[self.get_generation_key(tag) for tag in tags],
+                    *[self.get_tag_key(tag) for tag in tags],
+                ],
+                args=[value, self.ttl_seconds, len(tags), *[generation.get(tag, 0) for tag in tags]]
+            )
+
+        except RedisError as e:
+            logger.error(f'Ошибка записи в Redis {e}')
+
+
+class TwoTierCache(CacheBackendInterface):
+    """
+    Двухуровневый кэш: локальный LRU процесса и общий Redis.
+    Инвалидация публикуется в канал Redis, по нему остальные процессы сбрасывают свой локальный уровень
+    и теги в subscribers - кэшах процесса, которые не хранятся в Redis (memory_cache)
+    """
+
+    def __init__(
+            self,
+            local: LocalCache,
+            shared: RedisCache,
+            channel: str = 'cache:invalidate',
+            subscribers: Iterable[MemoryCache] = ()
+    ):
+        self.local = local
+        self.shared = shared
+        self.channel = channel
+        self.subscribers = tuple(subscribers)
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(
+            self,
+            key: str
+    ) -> Optional[Any]:
+        if (value := await self.local.get(key)) is not None:
+            return value
+
+        if (value := await self.shared.get(key)) is not None:
+            await self.local.set(key, value)
+
+        return value
+
+    async def set(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str] = ()
+    ) -> None:
+        await self.local.set(key, value)
+        await self.shared.set(key, value, tags=tags)
+
+    async def get_generation(
+            self,
+            tags: Iterable[str]
+    ) -> Tuple[Tuple[int, Dict[str, int]], Optional[Dict[str, int]]]:
+        tags = tuple(tags)
+
+        # Локальное поколение берется первым: очистка по сообщению из канала меняет его до чтения из Redis
+        return await self.local.get_generation(tags), await self.shared.get_generation(tags)
+
+    async def set_if_unchanged(
+            self,
+            key: str,
+            value: Any,
+            tags: Iterable[str],
+            generation: Tuple[Tuple[int, Dict[str, int]], Optional[Dict[str, int]]]
+    ) -> None:
+        local_generation, shared_generation = generation
+        tags = tuple(tags)
+
+        await self.shared.set_if_unchanged(key, value, tags=tags, generation=shared_generation)
+        await self.local.set_if_unchanged(key, value, tags=(), generation=local_generation)
+
+    async def invalidate(
+            self,
+            *tags: str
+    ) -> None:
+        # Теги записей, прочитанных из Redis, процессу неизвестны, поэтому локальный уровень
+        # сбрасывается целиком. Запись в справочники редкая, это дешевле хранения тегов в Redis
+        await self.local.clear()
+        await self.shared.invalidate(*tags)
+
+        try:
+            await self.shared.client.publish(self.channel, json.dumps(tags))
+
+        except RedisError as e:
+            logger.error(f'Ошибка публикации инвалидации кэша в Redis {e}')
+
+    async def listen_invalidations(self) -> None:
+        while True:
+            try:
+                async with self.shared.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            await self.local.clear()
+
+                            for subscriber in self.subscribers:
+                                await subscriber.invalidate(*json.loads(message['data']))
+
+            except RedisError as e:
+                logger.error(f'Потеряна подписка на инвалидацию кэша в Redis {e}')
+
+                # Пока подписки нет, сообщения могли быть пропущены
+                await self.local.clear()
+
+                for subscriber in self.subscribers:
+                    await subscriber.clear()
+
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.listen_invalidations())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self.shared.client.aclose()
+
+
+def get_response_cache(
+        subscribers: Iterable[MemoryCache] = ()
+) -> CacheBackendInterface:
+    backend = config.RESPONSE_CACHE_BACKEND
+
+    if backend == 'memory':
+        return MemoryCache()
+
+    local = LocalCache(
+        max_size=config.RESPONSE_CACHE_LOCAL_MAX_SIZE,
+        ttl_seconds=config.RESPONSE_CACHE_LOCAL_TTL_SECONDS
+    )
+
+    if backend == 'local':
+        return local
+
+    if config.REDIS_HOST is None:
+        logger.warning('Redis не настроен, кэш ответов хранится только в памяти процесса')
+        return local
+
+    shared = RedisCache(
+        client=aioredis.Redis(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            password=config.REDIS_PASSWORD,
+        ),
+        ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+        prefix='pipif:response'
+    )
+
+    if backend == 'redis':
+        return shared
+
+    return TwoTierCache(
+        local=local,
+        shared=shared,
+        channel='pipif:response:invalidate',
+        subscribers=subscribers
+    )
+
+
+memory_cache = MemoryCache()
+response_cache = get_response_cache(
+    subscribers=[memory_cache]
+)
+
+
+async def invalidate_cache(
+        *tags: str
+) -> None:
+    """
+    Сбрасывает записи кэша объектов и кэша ответов, помеченные тегами (именами таблиц).
+    С Redis инвалидация доходит до всех процессов API через канал TwoTierCache.
+    Чтения, начатые до записи, не отдаются вызовам, пришедшим после нее
+    """
+    flight.forget(*tags)
+    await memory_cache.invalidate(*tags)
+    await response_cache.invalidate(*tags)
+
+
+async def get_tags_etag(
+        tags: Tuple[str, ...]
+) -> str:
+    """
+    Строгий ETag по версиям таблиц (count и max(dt_update)).
+    Версии хранятся в response_cache с тегом своей таблицы и сбрасываются вместе с ответами,
+    поэтому запрос к БД нужен только после записи в таблицу.
+    Версия сохраняется, только если таблица не инвалидировалась с начала чтения:
+    версия, прочитанная до записи, не переживет инвалидацию этой записи
+    """
+    versions = {tag: await response_cache.get(f'version:{tag}') for tag in tags}
+
+    if missing_tags := [tag for tag, version in versions.items() if version is None]:
+        generation = await response_cache.get_generation(missing_tags)
+        tables_version = await flight.do(
+            operation='db.get_tables_version',
+            key=tuple(missing_tags),
+            func=lambda: get_tables_version(
+                tables=[Base.metadata.tables[tag] for tag in missing_tags]
+            ),
+            tags=missing_tags
+        )
+
+        for tag, version in tables_version.items():
+            versions[tag] = version.encode()
+            await response_cache.set_if_unchanged(f'version:{tag}', versions[tag], tags=[tag], generation=generation)
+
+    return f'"{hashlib.md5(b"|".join(versions[tag] for tag in tags)).hexdigest()}"'
+
+
+def is_not_modified(
+        request: Request,
+        etag: str
+) -> bool:
+    if (if_none_match := request.headers.get('if-none-match')) is None:
+        return False
+
+    # Сравнение слабое: ответ, сжатый CompressionMiddleware, отдается со слабым W/ ETag
+    return if_none_match.strip() == '*' or etag in [item.strip().removeprefix('W/') for item in if_none_match.split(',')]
+
+
+# Ключ scope запроса, в котором cache_response передает теги ответа middleware
+CACHE_TAGS_SCOPE_KEY = 'cache_tags'
+
+
+def cache_response(
+        tags: Iterable[str],
+        bypass: Optional[Callable[[Dict[str, Any]], bool]] = None
+):
+    """
+    Кэширует JSON ответа GET эндпоинта в response_cache.
+    Ключ строится из пути маршрута, ETag таблиц (тегов) и параметров запроса, ответ сериализуется
+    по response_model маршрута так же, как это делает FastAPI.
+    Если переданный If-None-Match совпадает с ETag, возвращается 304 без чтения и сериализации данных.
+    bypass получает параметры эндпоинта и возвращает True, если кэш нужно обойти
+    (например, когда эндпоинт записывает запрос пользователя в фоне)
+    """
+    tags = tuple(tags)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(
+                *args,
+                cache_request: Request,
+                **kwargs
+        ):
+            params = {
+                name: value for name, value in kwargs.items()
+                if not isinstance(value, (BackgroundTasks, Request))
+            }
+
+            if bypass is not None and bypass(params):
+                return await func(*args, **kwargs)
+
+            etag = await get_tags_etag(tags)
+
+            # По тегам ответа CompressionMiddleware помечает кэш сжатого тела
+            cache_request.scope[CACHE_TAGS_SCOPE_KEY] = tags
+
+            if is_not_modified(cache_request, etag):
+                return Response(
+                    status_code=304,
+                    headers={'ETag': etag}
+                )
+
+            route = cache_request.scope['route']
+            key = f'{route.path}:{etag}:{json.dumps(jsonable_encoder(params), sort_keys=True)}'
+
+            if (body := await response_cache.get(key)) is not None:
+                return Response(
+                    content=body,
+                    media_type='application/json',
+                    headers={'ETag': etag, 'X-Cache': 'HIT'}
+                )
+
+            async def render() -> Union[bytes, Response]:
+                result = await func(*args, **kwargs)
+
+                # Эндпоинт мог сам сериализовать ответ (FastResponseData), тогда кэшируется готовое тело
+                if isinstance(result, Response):
+                    if result.status_code != 200:
+                        return result
+
+                    body = bytes(result.body)
+
+                else:
+                    content = await serialize_response(
+                        field=route.response_field,
+                        response_content=result,
+                        exclude_unset=route.response_model_exclude_unset,
+                        exclude_defaults=route.response_model_exclude_defaults,
+                        exclude_none=route.response_model_exclude_none,
+                        by_alias=route.response_model_by_alias,
+                        is_coroutine=True
+                    )
+                    body = json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode()
+
+                await response_cache.set(key, body, tags=tags)
+
+                return body
+
+            # Одинаковые запросы при пустом кэше ждут один вызов эндпоинта
+            body = await flight.do(
+                operation='cache_response',
+                key=key,
+                func=render,
+                tags=tags
+            )
+
+            if isinstance(body, Response):
+                return body
+
+            return Response(
+                content=body,
+                media_type='application/json',
+                headers={'ETag': etag, 'X-Cache': 'MISS'}
+            )
+
+        # Request нужен декоратору для пути маршрута, FastAPI передаст его по аннотации
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter('cache_request', inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ]
+        )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,111 @@
+import zlib
+from typing import Dict, Optional
+
+import brotli
+import zstandard
+
+# Порядок предпочтения сервера, если клиент принимает несколько кодировок с одинаковым q
+ENCODINGS = ('br', 'zstd', 'gzip')
+
+# Уровни подобраны для сжатия на лету: заметно меньше gzip по умолчанию на кириллическом JSON
+# и без долгих максимальных уровней
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# Сжимаются только текстовые ответы. Файлы (docx, pdf, png) уже сжаты внутри формата
+COMPRESSIBLE_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/xml',
+    'application/javascript',
+)
+
+
+def parse_accept_encoding(
+        header: str
+) -> Dict[str, float]:
+    accepted = {}
+
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+
+        if not name:
+            continue
+
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+
+        accepted[name.lower()] = quality
+
+    return accepted
+
+
+def get_response_encoding(
+        accept_encoding: str
+) -> Optional[str]:
+    """
+    Выбирает кодировку ответа по заголовку Accept-Encoding с учетом q и предпочтений сервера
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    default_quality = accepted.get('*', 0.0)
+
+    qualities = {encoding: accepted.get(encoding, default_quality) for encoding in ENCODINGS}
+    encoding = max(ENCODINGS, key=lambda name: qualities[name])
+
+    return encoding if qualities[encoding] > 0 else None
+
+
+def is_compressible(
+        content_type: Optional[str]
+) -> bool:
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+class StreamCompressor:
+    """
+    Потоковое сжатие ответа частями с общим интерфейсом для brotli, zstd и gzip
+    """
+
+    def __init__(
+            self,
+            encoding: str
+    ):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = compressor.process
+            self._flush = compressor.finish
+
+        elif encoding == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._compress = compressor.compress
+            self._flush = compressor.flush
+
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            self._compress = compressor.compress
+            self._flush = compressor.flush
+
+    def compress(
+            self,
+            data: bytes
+    ) -> bytes:
+        return self._compress(data)
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+def compress(
+        encoding: str,
+        data: bytes
+) -> bytes:
+    compressor = StreamCompressor(encoding)
+
+    return compressor.compress(data) + compressor.flush()
@@ -3,6 +3,7 @@ from typing import Optional, Union
 
 from fastapi import UploadFile
 from config import S3_ACCESS_KEY, S3_SECRET_KEY
+from common_lib.single_flight import single_flight
 from .interface import FileStorageInterface
 from .s3_storage import S3Storage
 from .local_storage import LocalStorage
@@ -32,6 +33,7 @@ class FileStorageManager:
             additional_path=additional_path
         )
 
+    @single_flight('file_storage.get_file')
     async def get_file(
             self,
             path: str
@@ -0,0 +1,137 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from prometheus_client import Counter
+
+single_flight_calls = Counter(
+    name='single_flight_calls_total',
+    documentation='Вызовы операций через single-flight',
+    labelnames=('operation',)
+)
+single_flight_coalesced = Counter(
+    name='single_flight_coalesced_total',
+    documentation='Вызовы, которые дождались уже выполняющегося одинакового вызова вместо своего',
+    labelnames=('operation',)
+)
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых конкурентных вызовов.
+    Пока вызов операции с ключом выполняется, остальные вызовы с тем же ключом ждут его результат
+    (или исключение) вместо повторного запроса к БД, S3 или Grafana.
+    Результат не сохраняется: после завершения вызова следующий вызов выполняется заново.
+    Вызов идет в отдельной задаче, поэтому отмена одного ожидающего (отключение клиента)
+    не отменяет вызов для остальных
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[str, Hashable], asyncio.Task] = {}
+        self._tags: Dict[Tuple[str, Hashable], FrozenSet[str]] = {}
+
+    async def do(
+            self,
+            operation: str,
+            key: Hashable,
+            func: Callable[[], Awaitable[Any]],
+            tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        tags - таблицы, которые читает вызов. После записи в них forget отвязывает вызов от ключа
+        """
+        single_flight_calls.labels(operation).inc()
+        call_key = (operation, key)
+
+        if (task := self._calls.get(call_key)) is not None:
+            single_flight_coalesced.labels(operation).inc()
+
+        else:
+            task = asyncio.ensure_future(func())
+            self._calls[call_key] = task
+            self._tags[call_key] = frozenset(tags)
+            task.add_done_callback(lambda done: self._discard(call_key, done))
+
+        return await asyncio.shield(task)
+
+    def _discard(
+            self,
+            call_key: Tuple[str, Hashable],
+            task: asyncio.Task
+    ) -> None:
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+            del self._tags[call_key]
+
+        # Исключение получают ожидающие вызовы, если их не осталось - оно не должно попасть в лог loop
+        if not task.cancelled():
+            task.exception()
+
+    def forget(
+            self,
+            *tags: str
+    ) -> None:
+        """
+        Новые вызовы после записи в таблицы tags не присоединяются к читающим их вызовам, начатым до записи
+        """
+        tags = frozenset(tags)
+
+        for call_key in [call_key for call_key, call_tags in self._tags.items() if call_tags & tags]:
+            del self._calls[call_key]
+            del self._tags[call_key]
+
+
+def make_key(
+        value: Any
+) -> Hashable:
+    """
+    Приводит аргументы к хэшируемому ключу, равному для равных аргументов:
+    списки и кортежи - к кортежам, множества - к frozenset, словари - к отсортированным парам.
+    Остальные значения должны быть хэшируемыми (числа, строки, классы моделей, Path, объекты-синглтоны)
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(make_key(item) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(make_key(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, make_key(item)) for key, item in value.items()))
+
+    hash(value)
+    return value
+
+
+def single_flight(
+        operation: Optional[str] = None,
+        tags: Optional[Callable[..., Iterable[str]]] = None
+):
+    """
+    Объединяет одинаковые конкурентные вызовы асинхронной функции.
+    tags получает аргументы вызова и возвращает таблицы, которые он читает.
+    Вызовы с нехэшируемыми аргументами выполняются без объединения
+    """
+
+    def decorator(func):
+        name = operation or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                key = make_key((args, kwargs))
+            except TypeError:
+                return await func(*args, **kwargs)
+
+            return await flight.do(
+                operation=name,
+                key=key,
+                func=lambda: func(*args, **kwargs),
+                tags=tags(*args, **kwargs) if tags is not None else ()
+            )
+
+        return wrapper
+
+    return decorator
+
+
+flight = SingleFlight()
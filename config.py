@@ -55,4 +55,52 @@ try:
     S3_SECRET_KEY = s3_data['data']['data']['S3SECRETKEY']
     S3_SSL_CERT = s3_data['data']['data']['S3SSLCERT']
 except InvalidPath:
-    logger.critical('Не найдены параметры для S3')
\ No newline at end of file
+    logger.critical('Не найдены параметры для S3')
+
+REDIS_HOST = None
+REDIS_PORT = 6379
+REDIS_PASSWORD = None
+
+try:
+    redis_data = client.secrets.kv.v2.read_secret_version(
+        path="Redis",
+        mount_point='pipif'
+    )
+    REDIS_HOST = redis_data['data']['data']['REDIS_HOST']
+    REDIS_PORT = int(redis_data['data']['data']['REDIS_PORT'])
+    REDIS_PASSWORD = redis_data['data']['data'].get('REDIS_PASSWORD')
+except InvalidPath:
+    logger.warning('Не найдены параметры для Redis')
+
+# Кэш ответов GET эндпоинтов: memory, local, redis или two_tier (локальный LRU + Redis)
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'two_tier')
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 600))
+RESPONSE_CACHE_LOCAL_MAX_SIZE = int(os.environ.get('RESPONSE_CACHE_LOCAL_MAX_SIZE', 1000))
+RESPONSE_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_LOCAL_TTL_SECONDS', 60))
+
+# Буфер отложенной записи запросов пользователей
+REQUESTS_BUFFER_FLUSH_INTERVAL_MS = int(os.environ.get('REQUESTS_BUFFER_FLUSH_INTERVAL_MS', 1000))
+REQUESTS_BUFFER_MAX_ROWS = int(os.environ.get('REQUESTS_BUFFER_MAX_ROWS', 500))
+# Сколько строк хранится в буфере, пока БД недоступна
+REQUESTS_BUFFER_MAX_PENDING_ROWS = int(os.environ.get('REQUESTS_BUFFER_MAX_PENDING_ROWS', 10000))
+
+# Кэш идентификаторов пользователей Telegram
+IDENTITY_CACHE_USERS_MAX_SIZE = int(os.environ.get('IDENTITY_CACHE_USERS_MAX_SIZE', 10000))
+
+# Секционирование и хранение таблицы Requests
+REQUESTS_PARTITIONS_MONTHS_AHEAD = int(os.environ.get('REQUESTS_PARTITIONS_MONTHS_AHEAD', 3))
+REQUESTS_PARTITIONS_CHECK_INTERVAL_HOURS = int(os.environ.get('REQUESTS_PARTITIONS_CHECK_INTERVAL_HOURS', 12))
+# 0 - секции не удаляются
+REQUESTS_RETENTION_MONTHS = int(os.environ.get('REQUESTS_RETENTION_MONTHS', 0))
+# archive - секция отсоединяется и остается отдельной таблицей, drop - секция удаляется
+REQUESTS_RETENTION_MODE = os.environ.get('REQUESTS_RETENTION_MODE', 'archive')
+
+# Запросы дольше порога пишутся в лог медленных запросов
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+
+# Ответы меньше порога (в байтах) не сжимаются
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024))
+
+# Пакетный запрос /batch/: максимум подзапросов в запросе и сколько из них выполняется одновременно
+BATCH_MAX_QUERIES = int(os.environ.get('BATCH_MAX_QUERIES', 20))
+BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', 4))
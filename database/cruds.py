@@ -1,15 +1,26 @@
 import asyncio
-from datetime import datetime, timedelta
+import hashlib
+import json
+import zlib
+from datetime import datetime, timedelta, date
 
 from common_lib.logger import logger
+from common_lib.cache import memory_cache, invalidate_cache
+from common_lib.single_flight import single_flight
 from .db_connection import postgres_db
+from .requests_buffer import requests_buffer
+from .identity_cache import identity_cache
+from .table_versions import get_tables_version, read_tables_version
 
 from schemas import pyggy_bank as pb_schemes
-from schemas.service import RequestCreate
-from schemas.song_event import SongEventCreate, SongEventCreateWithSong
+from schemas.service import RequestCreate, TopContentResponse, TelegramUser
+from schemas.song_event import SongEventCreate, SongEventCreateWithSong, SongEventResponse
+from schemas.sync import SyncChangesResponse, TableChanges
 
-from sqlalchemy import select, and_, inspect, update
+from sqlalchemy import select, and_, update, delete, insert, func, literal, cast, Integer, Row, DateTime, any_
+from sqlalchemy.dialects.postgresql import array, ARRAY, insert as pg_insert
 from sqlalchemy.orm import DeclarativeBase, selectinload
+from sqlalchemy.sql.expression import CTE
 from fuzzywuzzy import fuzz
 
 from typing import (
@@ -17,13 +28,20 @@ from typing import (
     List,
     Union,
     Dict,
-    Optional
+    Optional,
+    FrozenSet,
+    Tuple,
+    Sequence,
+    Mapping,
+    AsyncIterator
 )
 
 from .models import (
     Base,
+    models_meta,
     CategorySong,
     Songs,
+    MethodicalBookChapters,
     PiggyBankKTD,
     PiggyBankGroupsForKTD,
     PiggyBankLegends,
@@ -31,8 +49,14 @@ from .models import (
     PiggyBankGames,
     PiggyBankGroupForGame,
     PiggyBankTypesGamesForGame,
+    PiggyBankGameLookup,
     RequestTypes,
     Requests,
+    RequestsDailyRollup,
+    Reviews,
+    TelegramUsers,
+    Tombstones,
+    SYNC_MODELS,
     SongEvents,
     SongsForSongsEvent
 )
@@ -74,18 +98,14 @@ class CRUDManagerSQL(CRUDManagerInterface):
             cls,
             model: Type[DeclarativeBase]
     ):
-        name_primary_key = (inspect(model)).primary_key[0].key
-        return getattr(model, name_primary_key)
+        return models_meta[model].primary_key
 
     @classmethod
     def get_model_columns(
             cls,
             model: Type[DeclarativeBase]
-    ):
-        inspector = inspect(model)
-        keys = inspector.columns.keys()
-
-        return keys
+    ) -> FrozenSet[str]:
+        return models_meta[model].column_keys
 
     @classmethod
     def check_body(
@@ -99,15 +119,9 @@ class CRUDManagerSQL(CRUDManagerInterface):
         model_keys = cls.get_model_columns(
             model=model
         )
-        error_keys = []
-
-        if isinstance(body, List):
-            for row in body:
-                error_keys.extend([key for key, value in row.items() if key not in model_keys])
-        else:
-            error_keys.extend([key for key, value in body.items() if key not in model_keys])
+        rows = body if isinstance(body, List) else [body]
 
-        return error_keys
+        return [key for row in rows for key in row if key not in model_keys]
 
 
     @staticmethod
@@ -142,28 +156,67 @@ class CRUDManagerSQL(CRUDManagerInterface):
             row_id: Optional[Union[int| List[int]]] = None,
             row_filter: Optional[Dict] = None
     ) -> List[Base]:
-
-        primary_key = cls.get_primary_key(
-            model=model
-        )
+        # Базовые запросы по первичному ключу собраны заранее в models_meta,
+        # значения подставляются через bindparam
+        model_meta = models_meta[model]
+        params = {}
 
         async with postgres_db.db_session() as session:
-            query = select(model)
-
             if isinstance(row_id, List):
-                query = query.filter(primary_key.in_(row_id))
+                query = model_meta.select_by_ids
+                params['pk_values'] = row_id
 
             elif isinstance(row_id, int):
-                query = query.filter(primary_key == row_id)
+                query = model_meta.select_by_id
+                params['pk_value'] = row_id
+
+            else:
+                query = model_meta.select_all
 
             if row_filter:
                 query = query.filter_by(**row_filter)
 
-            result = await session.execute(query)
+            result = await session.execute(query, params)
             data = result.scalars().all()
 
             return data
 
+    @classmethod
+    @single_flight('db.get_rows', tags=lambda *args, model, **kwargs: [model.__tablename__])
+    @check_body_decorator
+    async def get_rows(
+            cls,
+            model: Type[DeclarativeBase],
+            row_id: Optional[Union[int | List[int]]] = None,
+            row_filter: Optional[Dict] = None
+    ) -> Sequence[Row]:
+        """
+        То же, что get_data, но без ORM: запрос идет по колонкам модели и возвращает строки Row
+        (доступ к полям как к атрибутам). Объекты не попадают в identity map сессии
+        и не инструментируются, поэтому чтение списков для ответа API дешевле по CPU и памяти
+        """
+        model_meta = models_meta[model]
+        params = {}
+
+        if isinstance(row_id, List):
+            query = model_meta.select_rows_by_ids
+            params['pk_values'] = row_id
+
+        elif isinstance(row_id, int):
+            query = model_meta.select_rows_by_id
+            params['pk_value'] = row_id
+
+        else:
+            query = model_meta.select_rows_all
+
+        if row_filter:
+            query = query.filter_by(**row_filter)
+
+        async with postgres_db.db_session() as session:
+            result = await session.execute(query, params)
+
+            return result.all()
+
     @classmethod
     @check_body_decorator
     async def delete_data(
@@ -186,8 +239,23 @@ class CRUDManagerSQL(CRUDManagerInterface):
             for row in rows:
                 await session.delete(row)
 
+            # Для синхронизируемых таблиц запоминаем удаленные id, их забирает /sync/changes/
+            if model in SYNC_MODELS:
+                primary_key = cls.get_primary_key(model=model)
+
+                session.add_all(
+                    [
+                        Tombstones(
+                            table_name=model.__tablename__,
+                            row_id=getattr(row, primary_key.key)
+                        ) for row in rows
+                    ]
+                )
+
             try:
                 await session.commit()
+                await invalidate_cache(model.__tablename__)
+
                 if isinstance(row_id, List):
                     return row_id
                 else:
@@ -213,12 +281,16 @@ class CRUDManagerSQL(CRUDManagerInterface):
                 try:
                     session.add_all(data)
                     await session.flush()
-                    return [row.to_dict() for row in data]
+                    new_rows = [row.to_dict() for row in data]
 
                 except Exception as e:
                     logger.error(f'Возникала непредвиденная ошибка при вставке {e}')
                     return []
 
+        await invalidate_cache(model.__tablename__)
+
+        return new_rows
+
 
     @classmethod
     @check_body_decorator
@@ -238,6 +310,7 @@ class CRUDManagerSQL(CRUDManagerInterface):
 
             try:
                 await session.commit()
+                await invalidate_cache(model.__tablename__)
                 return True
 
             except Exception as e:
@@ -245,6 +318,81 @@ class CRUDManagerSQL(CRUDManagerInterface):
                 session.rollback()
                 return False
 
+    # Ограничение глубины рекурсии на случай зацикленных parent_id
+    TREE_MAX_DEPTH = 32
+
+    @classmethod
+    def get_tree_cte(
+            cls,
+            model: Type[DeclarativeBase],
+            columns: List
+    ) -> CTE:
+        """
+        Рекурсивный CTE по parent_id: все записи модели, начиная с корневых, с уровнем вложенности (level)
+        """
+        tree = select(
+            model.id,
+            model.parent_id,
+            *columns,
+            literal(0).label('level')
+        ).where(
+            model.parent_id.is_(None)
+        ).cte(
+            name=f'{model.__tablename__}_tree',
+            recursive=True
+        )
+
+        return tree.union_all(
+            select(
+                model.id,
+                model.parent_id,
+                *columns,
+                tree.c.level + 1
+            ).join(
+                tree,
+                model.parent_id == tree.c.id
+            ).where(
+                tree.c.level < cls.TREE_MAX_DEPTH
+            )
+        )
+
+    @staticmethod
+    def build_tree(
+            rows: Sequence[Mapping]
+    ) -> List[Dict]:
+        """
+        Собирает вложенное дерево из плоских строк, отсортированных по уровню
+        """
+        # Родитель всегда обработан раньше детей, т.к. строки отсортированы по уровню
+        nodes = {}
+        tree = []
+
+        for row in rows:
+            node = {key: value for key, value in row.items() if key != 'level'}
+            node['childrens'] = []
+            nodes[row['id']] = node
+
+            if row['parent_id'] is None:
+                tree.append(node)
+            else:
+                nodes[row['parent_id']]['childrens'].append(node)
+
+        return tree
+
+    @classmethod
+    async def get_table_version(
+            cls,
+            model: Type[DeclarativeBase]
+    ) -> str:
+        """
+        Версия таблицы для ETag: меняется при вставке и удалении (count) и при обновлении (max(dt_update))
+        """
+        versions = await get_tables_version(
+            tables=[model.__table__]
+        )
+
+        return f'"{hashlib.md5(versions[model.__tablename__].encode()).hexdigest()}"'
+
     @classmethod
     async def search_by_title(
             cls,
@@ -284,54 +432,240 @@ class CRUDManagerSQL(CRUDManagerInterface):
             request_type_title: str,
             body: Union[List[RequestCreate], RequestCreate]
     ):
-        if not (request_type := await cls.get_data(
-            model=RequestTypes,
-            row_filter={
-                'title': request_type_title
-            }
-        )):
+        if (request_type_id := await identity_cache.get_request_type_id(request_type_title)) is None:
             return
 
-        if isinstance(body, Dict):
+        if isinstance(body, (Dict, RequestCreate)):
             body = [body]
 
+        # Запись идет через буфер, который вставляет накопленные строки одним запросом
+        await requests_buffer.add(
+            [
+                {**dict(request), 'id_request_type': request_type_id}
+                for request in body
+            ]
+        )
+
 
-        for request in body:
-            request_data = dict(request)
-            request_data['id_request_type'] = request_type[0].id
+class MethodicalBookCruds(CRUDManagerSQL):
 
-            await cls.insert_data(
-                model=Requests,
-                body=request_data
-            )
+    @classmethod
+    async def get_chapters_tree(
+            cls
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Возвращает ETag и полное оглавление методички.
+        Дерево и ETag (хэш содержимого) хранятся в памяти до записи в таблицу глав,
+        поэтому повторные запросы не обращаются к БД
+        """
+        cache_key = 'chapters_tree'
+
+        if (cached := await memory_cache.get(cache_key)) is not None:
+            return cached['etag'], cached['tree']
+
+        generation = await memory_cache.get_generation([MethodicalBookChapters.__tablename__])
+
+        chapters_tree = cls.get_tree_cte(
+            model=MethodicalBookChapters,
+            columns=[
+                MethodicalBookChapters.title,
+                MethodicalBookChapters.file_path.is_not(None).label('has_file')
+            ]
+        )
+
+        query = select(
+            chapters_tree
+        ).order_by(
+            chapters_tree.c.level,
+            chapters_tree.c.id
+        )
+
+        async with postgres_db.db_session() as session:
+            result = await session.execute(query)
+            tree = cls.build_tree(result.mappings().all())
+
+        etag = f'"{hashlib.md5(json.dumps(tree, sort_keys=True, default=str).encode()).hexdigest()}"'
+
+        # Дерево, прочитанное до записи в таблицу, не сохраняется после ее инвалидации
+        await memory_cache.set_if_unchanged(
+            cache_key,
+            {'etag': etag, 'tree': tree},
+            tags=[MethodicalBookChapters.__tablename__],
+            generation=generation
+        )
+
+        return etag, tree
 
 
 class SongCruds(CRUDManagerSQL):
 
+    @classmethod
+    async def get_category_tree(
+            cls,
+            with_songs_count: bool = False
+    ) -> List[Dict]:
+        """
+        Возвращает полное дерево категорий песен одним рекурсивным запросом.
+        Результат кэшируется в памяти и сбрасывается при записи в CategorySong (и Songs, если нужны счетчики)
+        """
+        cache_key = f'category_tree:{with_songs_count}'
+
+        if (tree := await memory_cache.get(cache_key)) is not None:
+            return tree
+
+        tags = [CategorySong.__tablename__, Songs.__tablename__] if with_songs_count else [CategorySong.__tablename__]
+        generation = await memory_cache.get_generation(tags)
+
+        category_tree = cls.get_tree_cte(
+            model=CategorySong,
+            columns=[CategorySong.name]
+        )
+
+        query = select(
+            category_tree.c.id,
+            category_tree.c.name,
+            category_tree.c.parent_id,
+        ).order_by(
+            category_tree.c.level,
+            category_tree.c.id
+        )
+
+        if with_songs_count:
+            songs_count = select(
+                Songs.category,
+                func.count(Songs.id).label('songs_count')
+            ).group_by(
+                Songs.category
+            ).subquery()
+
+            query = query.add_columns(
+                func.coalesce(songs_count.c.songs_count, 0).label('songs_count')
+            ).join(
+                songs_count,
+                songs_count.c.category == category_tree.c.id,
+                isouter=True
+            )
+
+        async with postgres_db.db_session() as session:
+            result = await session.execute(query)
+            tree = cls.build_tree(result.mappings().all())
+
+        # Дерево, прочитанное до записи в таблицы, не сохраняется после их инвалидации
+        await memory_cache.set_if_unchanged(
+            cache_key,
+            tree,
+            tags=tags,
+            generation=generation
+        )
+
+        return tree
+
     @classmethod
     async def get_all_songs_by_category(
-            cls
-    ) -> List[Songs]:
+            cls,
+            is_short: bool = False
+    ) -> List[Dict]:
+        """
+        Возвращает категории вместе с песнями (два запроса: категории и selectinload песен).
+        При is_short у песен загружаются только id, title и category - этого хватает для меню бота
+        """
+        cache_key = f'songs_by_category:{is_short}'
+
+        if (categories := await memory_cache.get(cache_key)) is not None:
+            return categories
+
+        tags = [CategorySong.__tablename__, Songs.__tablename__]
+        generation = await memory_cache.get_generation(tags)
+
+        songs_loader = selectinload(CategorySong.rel_songs)
+
+        if is_short:
+            songs_loader = songs_loader.load_only(Songs.id, Songs.title, Songs.category)
 
         async with postgres_db.db_session() as session:
-            query = select(CategorySong).join(Songs, CategorySong.id == Songs.category, isouter=True)
+            query = select(CategorySong).options(songs_loader).order_by(CategorySong.id)
             query_result = await session.execute(query)
-            data = query_result.scalars().all()
 
-            return data
+            categories = [
+                {
+                    **category.to_dict(),
+                    'rel_songs': [
+                        {'id': song.id, 'title': song.title, 'category': song.category} if is_short else song.to_dict()
+                        for song in category.rel_songs
+                    ]
+                }
+                for category in query_result.scalars().all()
+            ]
+
+        # Группировка, прочитанная до записи в песни или категории, не сохраняется после их инвалидации
+        await memory_cache.set_if_unchanged(
+            cache_key,
+            categories,
+            tags=tags,
+            generation=generation
+        )
+
+        return categories
 
     @classmethod
     async def search_all_songs_by_title(
             cls,
             title_song: str
-    ) -> List[Songs]:
+    ) -> List[Row]:
 
-        all_songs = await cls.get_data(
+        all_songs = await cls.get_rows(
             model=Songs,
         )
 
         return [song for song in all_songs if fuzz.WRatio(song.title, title_song) > 75]
 
+    @classmethod
+    async def delete_categories(
+            cls,
+            category_ids: List[int]
+    ) -> List[int]:
+        """
+        Удаляет категории в одной транзакции с отвязкой их песен.
+        Песни отвязываются явно, а не через ON DELETE SET NULL, чтобы у них обновился dt_update
+        и /sync/changes/ отдал их клиентам
+        """
+        async with postgres_db.db_session() as session:
+            async with session.begin():
+                await session.execute(
+                    update(
+                        Songs
+                    ).where(
+                        Songs.category.in_(category_ids)
+                    ).values(
+                        category=None,
+                        dt_update=func.now()
+                    )
+                )
+
+                result = await session.execute(
+                    delete(
+                        CategorySong
+                    ).where(
+                        CategorySong.id.in_(category_ids)
+                    ).returning(
+                        CategorySong.id
+                    )
+                )
+                deleted_ids = list(result.scalars())
+
+                session.add_all(
+                    [
+                        Tombstones(
+                            table_name=CategorySong.__tablename__,
+                            row_id=category_id
+                        ) for category_id in deleted_ids
+                    ]
+                )
+
+        await invalidate_cache(CategorySong.__tablename__, Songs.__tablename__)
+
+        return deleted_ids
+
 
 class KTDCruds(CRUDManagerSQL):
 
@@ -352,6 +686,7 @@ class KTDCruds(CRUDManagerSQL):
                         )
 
                         session.add(item_data)
+                        await session.flush()
 
                         session.add_all(
                             [
@@ -369,23 +704,32 @@ class KTDCruds(CRUDManagerSQL):
                 logger.error(f'Возникла неожиданная ошибка при создании КТД {e}')
                 await session.rollback()
 
+        await invalidate_cache(PiggyBankKTD.__tablename__, PiggyBankGroupsForKTD.__tablename__)
+
         return new_ktds
 
     @classmethod
     async def get_ktd_by_group(
             cls,
             group_id: int
-    ) -> List[PiggyBankKTD]:
+    ) -> Sequence[Row]:
+
+        # id КТД группы собираются в массив заранее, поэтому КТД читаются по первичному ключу,
+        # а не полным сканированием таблицы с hash join (как планирует EXISTS при десятках связей на группу)
+        ktd_ids = select(
+            PiggyBankGroupsForKTD.ktd_id
+        ).filter(
+            PiggyBankGroupsForKTD.group_id == group_id
+        )
 
         async with postgres_db.db_session() as session:
-            query = select(PiggyBankKTD).where(
-                PiggyBankKTD.rel_groups.any(PiggyBankGroupsForKTD.group_id == group_id)
+            query = select(*models_meta[PiggyBankKTD].column_attrs).where(
+                PiggyBankKTD.id == any_(func.array(ktd_ids.scalar_subquery()))
             )
 
             result = await session.execute(query)
-            data = result.scalars().all()
 
-            return data
+            return result.all()
 
 
 class LegendCruds(CRUDManagerSQL):
@@ -407,6 +751,7 @@ class LegendCruds(CRUDManagerSQL):
                         )
 
                         session.add(item_data)
+                        await session.flush()
 
                         session.add_all(
                             [
@@ -424,28 +769,35 @@ class LegendCruds(CRUDManagerSQL):
             except Exception as e:
                 logger.error(f'При создании легенды возникла ошибка: {e}')
 
+        await invalidate_cache(PiggyBankLegends.__tablename__, PiggyBankGroupsForLegend.__tablename__)
+
         return new_legends
 
     @classmethod
     async def get_legends_by_group(
             cls,
             group_id: int
-    ) -> List[PiggyBankLegends]:
+    ) -> Sequence[Row]:
+
+        # Как и в get_ktd_by_group: легенды читаются по первичному ключу из массива id группы
+        legend_ids = select(
+            PiggyBankGroupsForLegend.legend_id
+        ).filter(
+            PiggyBankGroupsForLegend.group_id == group_id
+        )
 
         async with postgres_db.db_session() as session:
-            query = select(PiggyBankLegends).where(
-                PiggyBankLegends.rel_groups.any(PiggyBankGroupsForLegend.group_id == group_id)
+            query = select(*models_meta[PiggyBankLegends].column_attrs).where(
+                PiggyBankLegends.id == any_(func.array(legend_ids.scalar_subquery()))
             )
 
             result = await session.execute(query)
-            data = result.scalars().all()
 
-            return data
+            return result.all()
 
 
 class GameCruds(CRUDManagerSQL):
 
-
     @classmethod
     async def insert_game_transaction(
             cls,
@@ -465,6 +817,7 @@ class GameCruds(CRUDManagerSQL):
                         )
 
                         session.add(game_data)
+                        await session.flush()
 
                         session.add_all(
                             [
@@ -483,14 +836,20 @@ class GameCruds(CRUDManagerSQL):
                                 ) for group_id in game.group_id
                             ]
                         )
-                        await session.flush()
-                        new_games.append(game_data.to_dict())
 
+                        # Строки PiggyBankGameLookup добавляет триггер на таблицах связей
                         await session.flush()
+                        new_games.append(game_data.to_dict())
 
             except Exception as e:
                 logger.error(f'Возникла ошибка при создании игры {e}')
 
+        await invalidate_cache(
+            PiggyBankGames.__tablename__,
+            PiggyBankGroupForGame.__tablename__,
+            PiggyBankTypesGamesForGame.__tablename__
+        )
+
         return new_games
 
     @classmethod
@@ -498,22 +857,21 @@ class GameCruds(CRUDManagerSQL):
             cls,
             group_id: int,
             type_id: int
-    ) -> List[PiggyBankGames]:
+    ) -> Sequence[Row]:
+        game_columns = models_meta[PiggyBankGames].column_attrs
 
         async with postgres_db.db_session() as session:
-            query = select(PiggyBankGames).where(
-                and_(
-
-                    PiggyBankGames.rel_types_for_game.any(PiggyBankTypesGamesForGame.type_id == type_id),
-                    PiggyBankGames.rel_groups_for_game.any(PiggyBankGroupForGame.group_id == group_id)
-
-                )
+            query = select(*game_columns).join(
+                PiggyBankGameLookup,
+                PiggyBankGameLookup.game_id == PiggyBankGames.id
+            ).where(
+                PiggyBankGameLookup.group_id == group_id,
+                PiggyBankGameLookup.type_id == type_id
             )
 
             result = await session.execute(query)
-            data = result.scalars().all()
 
-            return data
+            return result.all()
 
 
     @classmethod
@@ -599,6 +957,8 @@ class SongEventCruds(CRUDManagerSQL):
             except Exception as e:
                 logger.error(f'Возникла неожиданная ошибка при создании КТД {e}')
 
+        await invalidate_cache(SongEvents.__tablename__, SongsForSongsEvent.__tablename__)
+
         return new_events
 
     @classmethod
@@ -606,10 +966,24 @@ class SongEventCruds(CRUDManagerSQL):
         cls,
         is_actual: bool = False,
         row_id: Optional[Union[int | List[int]]] = None,
-    ):
+    ) -> List[SongEventResponse]:
+        # id песен собираются в массив на стороне Postgres, без загрузки SongsForSongsEvent в ORM
+        song_ids = func.array_agg(
+            SongsForSongsEvent.song_id
+        ).filter(
+            SongsForSongsEvent.song_id.is_not(None)
+        )
+
         async with postgres_db.db_session() as session:
-            query = select(SongEvents).options(
-                selectinload(SongEvents.rel_songs)
+            query = select(
+                *models_meta[SongEvents].column_attrs,
+                func.coalesce(song_ids, cast(array([]), ARRAY(Integer))).label('song_ids')
+            ).join(
+                SongsForSongsEvent,
+                SongsForSongsEvent.event_id == SongEvents.id,
+                isouter=True
+            ).group_by(
+                SongEvents.id
             )
 
             if isinstance(row_id, List):
@@ -622,7 +996,250 @@ class SongEventCruds(CRUDManagerSQL):
                 query = query.filter(SongEvents.end_dt > datetime.now())
 
             result = await session.execute(query)
-            data = result.scalars().all()
 
-            return data
+            return [SongEventResponse.model_validate(row) for row in result.mappings().all()]
+
+
+class TelegramUserCruds(CRUDManagerSQL):
+
+    @classmethod
+    async def insert_user_if_not_exists(
+            cls,
+            user: TelegramUser
+    ) -> Optional[int]:
+        """
+        Создает пользователя одним запросом.
+        Возвращает id нового пользователя или None, если пользователь уже существует
+        """
+        query = pg_insert(
+            TelegramUsers
+        ).values(
+            **user.model_dump()
+        ).on_conflict_do_nothing(
+            index_elements=[TelegramUsers.telegram_id]
+        ).returning(
+            TelegramUsers.id
+        )
+
+        async with postgres_db.db_session() as session:
+            async with session.begin():
+                user_id = await session.scalar(query)
+
+        if user_id is not None:
+            await invalidate_cache(TelegramUsers.__tablename__)
+
+        return user_id
+
+
+class ReviewCruds(CRUDManagerSQL):
+
+    @classmethod
+    async def claim_new_reviews(
+            cls,
+            limit: int
+    ) -> List[Dict]:
+        # Отзывы помечаются просмотренными и возвращаются одним запросом,
+        # SKIP LOCKED не дает двум модераторам получить один и тот же отзыв
+        new_reviews_ids = select(
+            Reviews.id
+        ).filter(
+            Reviews.looked_status == 0
+        ).order_by(
+            Reviews.id
+        ).limit(
+            limit
+        ).with_for_update(
+            skip_locked=True
+        ).scalar_subquery()
+
+        query = update(
+            Reviews
+        ).where(
+            Reviews.id.in_(new_reviews_ids)
+        ).values(
+            looked_status=1
+        ).returning(
+            *models_meta[Reviews].column_attrs
+        )
+
+        async with postgres_db.db_session() as session:
+            async with session.begin():
+                result = await session.execute(query)
+                reviews = [dict(row) for row in result.mappings()]
+
+        await invalidate_cache(Reviews.__tablename__)
+
+        return sorted(reviews, key=lambda review: review['id'])
+
+    @classmethod
+    async def get_reviews(
+            cls,
+            limit: int,
+            offset: int
+    ) -> Tuple[int, List[Base]]:
+        async with postgres_db.db_session() as session:
+            total = await session.scalar(select(func.count()).select_from(Reviews))
+
+            result = await session.execute(
+                models_meta[Reviews].select_all.order_by(Reviews.id.desc()).limit(limit).offset(offset)
+            )
+
+            return total, result.scalars().all()
+
+
+class SyncCruds(CRUDManagerSQL):
+    # Запас для записей, транзакции которых начались до курсора, а зафиксировались после
+    CURSOR_OVERLAP = timedelta(seconds=5)
+
+    @classmethod
+    async def get_changes(
+            cls,
+            since: Optional[datetime] = None
+    ) -> SyncChangesResponse:
+        changes = {}
+
+        async with postgres_db.db_session() as session:
+            # Все таблицы читаются из одного снимка БД
+            await session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+            # localtimestamp в часовом поясе сессии, как и now() в dt_update, иначе курсор сдвинут на смещение пояса
+            cursor = await session.scalar(select(func.localtimestamp()))
+
+            if since is not None and since.tzinfo is not None:
+                # Курсор с часовым поясом (например, ...Z) приводится к поясу сессии, в котором хранятся dt_update
+                since = await session.scalar(
+                    select(
+                        func.timezone(func.current_setting('TimeZone'), literal(since, DateTime(timezone=True)))
+                    )
+                )
+
+            for model in SYNC_MODELS:
+                query = models_meta[model].select_all.order_by(model.dt_update)
+
+                if since:
+                    query = query.filter(model.dt_update > since)
+
+                table_changes = TableChanges()
+
+                for row in (await session.execute(query)).scalars():
+                    if since and (row.dt_create is None or row.dt_create <= since):
+                        table_changes.updated.append(row.to_dict())
+                    else:
+                        table_changes.created.append(row.to_dict())
+
+                changes[model.__tablename__] = table_changes
+
+            if since:
+                tombstones = await session.execute(
+                    select(
+                        Tombstones.table_name,
+                        Tombstones.row_id
+                    ).filter(
+                        Tombstones.dt_create > since
+                    )
+                )
+
+                for table_name, row_id in tombstones:
+                    if table_name in changes:
+                        changes[table_name].deleted.append(row_id)
+
+        return SyncChangesResponse(
+            cursor=cursor - cls.CURSOR_OVERLAP,
+            changes=changes
+        )
+
+
+class ExportCruds(CRUDManagerSQL):
+    EXPORT_MODELS = SYNC_MODELS + (
+        PiggyBankGroupForGame,
+        PiggyBankTypesGamesForGame,
+        PiggyBankGroupsForLegend,
+        PiggyBankGroupsForKTD,
+        SongsForSongsEvent,
+    )
+    # Количество строк, которое читается из курсора и сжимается за один раз
+    CHUNK_ROWS = 1000
+
+    @staticmethod
+    def serialize_value(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    @classmethod
+    async def stream_snapshot(cls) -> AsyncIterator[Union[str, bytes]]:
+        """
+        Отдает все таблицы каталога в виде NDJSON, сжатого gzip.
+        Первым элементом отдается ETag снимка: версия таблиц считается в той же транзакции
+        REPEATABLE READ, из которой читаются строки, поэтому ETag соответствует выгруженным данным.
+        Строки читаются серверным курсором порциями по CHUNK_ROWS,
+        поэтому расход памяти не зависит от размера таблиц
+        """
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+        async with postgres_db.db_session() as session:
+            await session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+            versions = await read_tables_version(
+                session=session,
+                tables=[model.__table__ for model in cls.EXPORT_MODELS]
+            )
+            yield f'"{hashlib.md5("".join(versions[model.__tablename__] for model in cls.EXPORT_MODELS).encode()).hexdigest()}"'
+
+            for model in cls.EXPORT_MODELS:
+                query = select(
+                    *models_meta[model].column_attrs
+                ).order_by(
+                    models_meta[model].primary_key
+                ).execution_options(
+                    yield_per=cls.CHUNK_ROWS
+                )
+
+                result = await session.stream(query)
+
+                async for rows in result.mappings().partitions():
+                    lines = ''.join(
+                        json.dumps(
+                            {'table': model.__tablename__, 'row': dict(row)},
+                            ensure_ascii=False,
+                            default=cls.serialize_value
+                        ) + '\n' for row in rows
+                    )
+
+                    if chunk := compressor.compress(lines.encode()):
+                        yield chunk
+
+        yield compressor.flush()
+
+
+class StatisticCruds(CRUDManagerSQL):
+
+    @classmethod
+    async def get_top_content(
+            cls,
+            request_type_title: str,
+            date_from: date,
+            date_to: date,
+            limit: int
+    ) -> List[TopContentResponse]:
+        # Топ считается по дневным счетчикам, а не по сырой таблице Requests
+        if (request_type_id := await identity_cache.get_request_type_id(request_type_title)) is None:
+            return []
+
+        total = func.sum(RequestsDailyRollup.count)
+
+        query = select(
+            RequestsDailyRollup.id_content,
+            func.max(RequestsDailyRollup.content_display_value).label('content_display_value'),
+            total.label('count')
+        ).filter(
+            RequestsDailyRollup.id_request_type == request_type_id,
+            RequestsDailyRollup.day.between(date_from, date_to)
+        ).group_by(
+            RequestsDailyRollup.id_content
+        ).order_by(
+            total.desc(),
+            RequestsDailyRollup.id_content
+        ).limit(limit)
+
+        async with postgres_db.db_session() as session:
+            result = await session.execute(query)
 
+            return [TopContentResponse(**row) for row in result.mappings()]
@@ -9,6 +9,8 @@ from sqlalchemy.ext.asyncio import (
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
+from .instrumentation import instrument_engine
+
 from config import (
     DB_USER,
     DB_PASS,
@@ -73,6 +75,8 @@ class DBConnectionSQL(DBConnectionInterface):
         self._engine = engine.get_engine()
         self._db_session = None
 
+        instrument_engine(self._engine)
+
     @property
     def db_session(self):
         if self._db_session is None:
@@ -82,6 +86,9 @@ class DBConnectionSQL(DBConnectionInterface):
 
     def switch_db(self, engine: DBEngineInterface):
         self._engine = engine.get_engine()
+        self._db_session = None
+
+        instrument_engine(self._engine)
 
     async def test_connection(self):
         try:
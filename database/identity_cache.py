@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+
+from common_lib.logger import logger
+from .db_connection import postgres_db
+from .models import TelegramUsers, RequestTypes
+
+from config import IDENTITY_CACHE_USERS_MAX_SIZE
+
+
+class IdentityCache:
+    """
+    Кэш неизменяемых соответствий, нужных при логировании запросов:
+    telegram_id -> TelegramUsers.id (ограниченный LRU) и
+    RequestTypes.title -> RequestTypes.id (загружается целиком при старте).
+    Дополнительно хранит множество всех известных telegram_id,
+    чтобы повторные /service/check_user/ не обращались к БД.
+    """
+
+    def __init__(
+            self,
+            users_max_size: int
+    ):
+        self._users_max_size = users_max_size
+
+        self._users: OrderedDict[int, int] = OrderedDict()
+        self._request_types: Dict[str, int] = {}
+        self._known_telegram_ids: Set[int] = set()
+
+    async def load_request_types(self) -> None:
+        try:
+            async with postgres_db.db_session() as session:
+                result = await session.execute(select(RequestTypes.title, RequestTypes.id))
+                self._request_types = dict(result.all())
+
+        except Exception as e:
+            logger.error(f'Не удалось загрузить типы запросов: {e}')
+
+    async def load_known_users(self) -> None:
+        try:
+            async with postgres_db.db_session() as session:
+                result = await session.execute(select(TelegramUsers.telegram_id))
+                self._known_telegram_ids = set(result.scalars())
+
+        except Exception as e:
+            logger.error(f'Не удалось загрузить пользователей Telegram: {e}')
+
+    def is_known_user(
+            self,
+            telegram_id: int
+    ) -> bool:
+        return telegram_id in self._known_telegram_ids
+
+    def add_known_user(
+            self,
+            telegram_id: int
+    ) -> None:
+        self._known_telegram_ids.add(telegram_id)
+
+    def set_user_id(
+            self,
+            telegram_id: int,
+            user_id: int
+    ) -> None:
+        self._users[telegram_id] = user_id
+        self._users.move_to_end(telegram_id)
+        self.add_known_user(telegram_id)
+
+        if len(self._users) > self._users_max_size:
+            self._users.popitem(last=False)
+
+    async def get_user_id(
+            self,
+            telegram_id: int
+    ) -> Optional[int]:
+        if (user_id := self._users.get(telegram_id)) is not None:
+            self._users.move_to_end(telegram_id)
+            return user_id
+
+        async with postgres_db.db_session() as session:
+            user_id = await session.scalar(
+                select(TelegramUsers.id).filter(TelegramUsers.telegram_id == telegram_id)
+            )
+
+        # Отсутствующих пользователей не кэшируем, они могут появиться через /service/check_user/
+        if user_id is not None:
+            self.set_user_id(
+                telegram_id=telegram_id,
+                user_id=user_id
+            )
+
+        return user_id
+
+    async def get_request_type_id(
+            self,
+            title: str
+    ) -> Optional[int]:
+        if (request_type_id := self._request_types.get(title)) is not None:
+            return request_type_id
+
+        async with postgres_db.db_session() as session:
+            request_type_id = await session.scalar(
+                select(RequestTypes.id).filter(RequestTypes.title == title)
+            )
+
+        if request_type_id is not None:
+            self._request_types[title] = request_type_id
+
+        return request_type_id
+
+
+identity_cache = IdentityCache(
+    users_max_size=IDENTITY_CACHE_USERS_MAX_SIZE
+)
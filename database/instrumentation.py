@@ -0,0 +1,99 @@
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from common_lib.logger import logger
+
+from config import SLOW_QUERY_THRESHOLD_MS
+
+db_queries_per_request = Histogram(
+    name='db_queries_per_request',
+    documentation='Количество SQL запросов на один HTTP запрос',
+    labelnames=('method', 'route'),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+db_time_per_request = Histogram(
+    name='db_time_per_request_seconds',
+    documentation='Суммарное время SQL запросов на один HTTP запрос',
+    labelnames=('method', 'route'),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+BIND_PARAM_PATTERN = re.compile(r'\$\d+')
+BIND_PARAM_LIST_PATTERN = re.compile(r'\?(?:, \?)+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@dataclass
+class QueryStats:
+    """
+    Статистика SQL запросов одного HTTP запроса.
+    scope хранится целиком, потому что маршрут становится известен только после роутинга
+    """
+    scope: Dict = field(repr=False)
+    count: int = 0
+    duration: float = 0
+
+    @property
+    def method(self) -> str:
+        return self.scope.get('method', '')
+
+    @property
+    def route(self) -> str:
+        # Шаблон пути вместо фактического, чтобы не плодить метки Prometheus
+        route = self.scope.get('route')
+        return getattr(route, 'path', 'unmatched')
+
+    def get_server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+    def observe(self) -> None:
+        db_queries_per_request.labels(method=self.method, route=self.route).observe(self.count)
+        db_time_per_request.labels(method=self.method, route=self.route).observe(self.duration)
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+def normalize_statement(
+        statement: str
+) -> str:
+    statement = BIND_PARAM_PATTERN.sub('?', statement)
+    statement = BIND_PARAM_LIST_PATTERN.sub('?...', statement)
+
+    return WHITESPACE_PATTERN.sub(' ', statement).strip()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время начала хранится в контексте выполнения, он создается заново для каждого запроса
+    context.query_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context.query_start
+    stats = query_stats.get()
+
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+
+    if duration * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            f'Медленный запрос {duration * 1000:.1f} мс, '
+            f'маршрут {f"{stats.method} {stats.route}" if stats else "вне HTTP запроса"}: '
+            f'{normalize_statement(statement)}'
+        )
+
+
+def instrument_engine(
+        engine: AsyncEngine
+) -> None:
+    if not event.contains(engine.sync_engine, 'before_cursor_execute', before_cursor_execute):
+        event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute', after_cursor_execute)
@@ -1,10 +1,14 @@
-from sqlalchemy.orm import DeclarativeBase, relationship
-from sqlalchemy import ForeignKey, Column, String, Integer, Date, LargeBinary, inspect, DateTime, func
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Tuple, Type
+
+from sqlalchemy.orm import DeclarativeBase, relationship, InstrumentedAttribute
+from sqlalchemy.sql import Select
+from sqlalchemy import ForeignKey, Column, String, Integer, Date, LargeBinary, inspect, DateTime, func, select, bindparam, Index, event, DDL
 
 
 class Base(DeclarativeBase):
     def to_dict(self):
-        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
+        return {key: getattr(self, key) for key in models_meta[type(self)].column_names}
 
     dt_create = Column(DateTime, server_default=func.now())
     dt_update = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -19,7 +23,7 @@ class Songs(Base):
     title_search = Column(String, index=True)
     text = Column(String(5000))
     file_path = Column(String, nullable=True)
-    category = Column(Integer, ForeignKey('CategorySong.id', ondelete='SET NULL'), nullable=True)
+    category = Column(Integer, ForeignKey('CategorySong.id', ondelete='SET NULL'), nullable=True, index=True)
 
     rel_category = relationship('CategorySong', back_populates='rel_songs')
     rel_events = relationship('SongsForSongsEvent', back_populates='rel_songs')
@@ -39,9 +43,11 @@ class Requests(Base):
 
     __tablename__ = 'Requests'
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Таблица секционирована по месяцам dt_create, поэтому колонка входит в первичный ключ
+    dt_create = Column(DateTime, server_default=func.now(), primary_key=True)
 
-    id_user = Column(Integer, ForeignKey('TelegramUsers.id'), nullable=True)
+    id_user = Column(Integer, ForeignKey('TelegramUsers.id'), nullable=True, index=True)
     id_request_type = Column(Integer, ForeignKey('RequestTypes.id'))
     id_content = Column(Integer)
 
@@ -50,6 +56,34 @@ class Requests(Base):
     rel_user = relationship('TelegramUsers', back_populates='rel_requests')
     rel_request_type = relationship('RequestTypes', back_populates='rel_requests')
 
+    __table_args__ = {
+        'postgresql_partition_by': 'RANGE (dt_create)'
+    }
+
+
+# При create_all у секционированной таблицы должна быть хотя бы секция по умолчанию
+event.listen(
+    Requests.__table__,
+    'after_create',
+    DDL('CREATE TABLE "Requests_default" PARTITION OF "Requests" DEFAULT')
+)
+
+
+class RequestsDailyRollup(Base):
+
+    __tablename__ = 'RequestsDailyRollup'
+
+    id_request_type = Column(Integer, ForeignKey('RequestTypes.id', ondelete='CASCADE'), primary_key=True)
+    id_content = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    content_display_value = Column(String(100))
+
+    __table_args__ = (
+        Index('ix_RequestsDailyRollup_id_request_type_day', 'id_request_type', 'day'),
+    )
+
 
 class RequestTypes(Base):
 
@@ -110,6 +144,11 @@ class Reviews(Base):
 
     tg_users = relationship('TelegramUsers', back_populates='reviews')
 
+    __table_args__ = (
+        # Новые отзывы выбираются по looked_status в порядке id
+        Index('ix_Reviews_looked_status_id', 'looked_status', 'id'),
+    )
+
 
 class MethodicalBookChapters(Base):
 
@@ -154,7 +193,7 @@ class PiggyBankGames(Base):
 
     id = Column(Integer, primary_key=True)
 
-    title = Column(String(100))
+    title = Column(String(100), index=True)
     description = Column(String(1024), nullable=True)
     file_path = Column(String(300), nullable=True)
 
@@ -169,6 +208,11 @@ class PiggyBankGroupForGame(Base):
 
     __tablename__ = 'PiggyBankGroupForGame'
 
+    __table_args__ = (
+        Index('uq_PiggyBankGroupForGame_game_id_group_id', 'game_id', 'group_id', unique=True),
+        Index('ix_PiggyBankGroupForGame_group_id_game_id', 'group_id', 'game_id'),
+    )
+
     id = Column(Integer, primary_key=True)
 
     group_id = Column(Integer, ForeignKey('PiggyBankGroups.id'))
@@ -186,6 +230,11 @@ class PiggyBankTypesGamesForGame(Base):
 
     __tablename__ = 'PiggyBankTypesGamesForGame'
 
+    __table_args__ = (
+        Index('uq_PiggyBankTypesGamesForGame_game_id_type_id', 'game_id', 'type_id', unique=True),
+        Index('ix_PiggyBankTypesGamesForGame_type_id_game_id', 'type_id', 'game_id'),
+    )
+
     id = Column(Integer, primary_key=True)
 
     type_id = Column(Integer, ForeignKey('PiggyBankTypesGame.id'))
@@ -195,13 +244,76 @@ class PiggyBankTypesGamesForGame(Base):
     rel_games = relationship('PiggyBankGames', back_populates='rel_types_for_game')
 
 
+class PiggyBankGameLookup(Base):
+
+    """
+    Денормализованная таблица поиска игр по паре (группа, тип игры).
+    Поддерживается триггерами на таблицах связей PiggyBankGroupForGame и PiggyBankTypesGamesForGame:
+    при вставке, обновлении и удалении связей строки затронутых игр пересобираются в той же транзакции
+    """
+
+    __tablename__ = 'PiggyBankGameLookup'
+
+    group_id = Column(Integer, primary_key=True)
+    type_id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, ForeignKey('PiggyBankGames.id', ondelete='CASCADE'), primary_key=True)
+
+
+GAME_LOOKUP_FUNCTION = DDL(
+    '''
+    CREATE OR REPLACE FUNCTION "refresh_PiggyBankGameLookup"() RETURNS trigger AS $$
+    DECLARE
+        game_ids integer[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            game_ids := ARRAY(SELECT game_id FROM new_rows);
+        ELSIF TG_OP = 'DELETE' THEN
+            game_ids := ARRAY(SELECT game_id FROM old_rows);
+        ELSE
+            game_ids := ARRAY(SELECT game_id FROM old_rows UNION SELECT game_id FROM new_rows);
+        END IF;
+
+        DELETE FROM "PiggyBankGameLookup" WHERE game_id IN (SELECT unnest(game_ids));
+
+        INSERT INTO "PiggyBankGameLookup"(group_id, type_id, game_id)
+        SELECT DISTINCT groups.group_id, types.type_id, groups.game_id
+        FROM "PiggyBankGroupForGame" groups
+        JOIN "PiggyBankTypesGamesForGame" types ON types.game_id = groups.game_id
+        WHERE groups.game_id IN (SELECT unnest(game_ids))
+            AND groups.group_id IS NOT NULL AND types.type_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    '''
+)
+
+# Триггеры уровня оператора с таблицами переходов: массовая вставка связей пересобирает строки одним запросом
+GAME_LOOKUP_TRIGGERS = tuple(
+    DDL(
+        f'CREATE TRIGGER "{table}_lookup_{operation.lower()}" AFTER {operation} ON "{table}" '
+        f'REFERENCING {transition} FOR EACH STATEMENT EXECUTE FUNCTION "refresh_PiggyBankGameLookup"()'
+    )
+    for table in ('PiggyBankGroupForGame', 'PiggyBankTypesGamesForGame')
+    for operation, transition in (
+        ('INSERT', 'NEW TABLE AS new_rows'),
+        ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+        ('DELETE', 'OLD TABLE AS old_rows'),
+    )
+)
+
+for ddl in (GAME_LOOKUP_FUNCTION, *GAME_LOOKUP_TRIGGERS):
+    event.listen(Base.metadata, 'after_create', ddl)
+
+
 class PiggyBankLegends(Base):
 
     __tablename__ = 'PiggyBankLegends'
 
     id = Column(Integer, primary_key=True)
 
-    title = Column(String(100), nullable=False)
+    title = Column(String(100), nullable=False, index=True)
     description = Column(String(1000), nullable=True)
 
     file_path = Column(String(1000), nullable=True)
@@ -217,6 +329,11 @@ class PiggyBankGroupsForLegend(Base):
 
     __tablename__ = 'PiggyBankGroupsForLegend'
 
+    __table_args__ = (
+        Index('uq_PiggyBankGroupsForLegend_legend_id_group_id', 'legend_id', 'group_id', unique=True),
+        Index('ix_PiggyBankGroupsForLegend_group_id_legend_id', 'group_id', 'legend_id'),
+    )
+
     id = Column(Integer, primary_key=True)
 
     legend_id = Column(Integer, ForeignKey('PiggyBankLegends.id'))
@@ -232,7 +349,7 @@ class PiggyBankKTD(Base):
 
     id = Column(Integer, primary_key=True)
 
-    title = Column(String(100), nullable=False)
+    title = Column(String(100), nullable=False, index=True)
     description = Column(String(1000), nullable=True)
 
     file_path = Column(String(1000), nullable=True)
@@ -248,6 +365,11 @@ class PiggyBankGroupsForKTD(Base):
 
     __tablename__ = 'PiggyBankGroupsForKTD'
 
+    __table_args__ = (
+        Index('uq_PiggyBankGroupsForKTD_ktd_id_group_id', 'ktd_id', 'group_id', unique=True),
+        Index('ix_PiggyBankGroupsForKTD_group_id_ktd_id', 'group_id', 'ktd_id'),
+    )
+
     id = Column(Integer, primary_key=True)
 
     ktd_id = Column(Integer, ForeignKey('PiggyBankKTD.id'))
@@ -265,7 +387,7 @@ class SongEvents(Base):
     title = Column(String(100), nullable=False)
 
     start_dt = Column(DateTime, nullable=False)
-    end_dt = Column(DateTime, nullable=False)
+    end_dt = Column(DateTime, nullable=False, index=True)
 
     duration = Column(Integer, nullable=False)
 
@@ -275,6 +397,11 @@ class SongEvents(Base):
 class SongsForSongsEvent(Base):
     __tablename__ = 'SongsForSongsEvent'
 
+    __table_args__ = (
+        Index('uq_SongsForSongsEvent_event_id_song_id', 'event_id', 'song_id', unique=True),
+        Index('ix_SongsForSongsEvent_song_id', 'song_id'),
+    )
+
     id = Column(Integer, primary_key=True)
 
     event_id = Column(Integer, ForeignKey('SongEvents.id'))
@@ -282,3 +409,85 @@ class SongsForSongsEvent(Base):
 
     rel_events = relationship('SongEvents', back_populates='rel_songs')
     rel_songs = relationship('Songs', back_populates='rel_events')
+
+
+class Tombstones(Base):
+    """
+    Удаленные строки синхронизируемых таблиц, нужны для /sync/changes/
+    """
+    __tablename__ = 'Tombstones'
+
+    id = Column(Integer, primary_key=True)
+
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_Tombstones_dt_create', 'dt_create'),
+    )
+
+
+# Таблицы каталога, изменения которых отдаются боту через /sync/changes/
+SYNC_MODELS: Tuple[Type[Base], ...] = (
+    Songs,
+    CategorySong,
+    MethodicalBookChapters,
+    PiggyBankGroups,
+    PiggyBankTypesGame,
+    PiggyBankGames,
+    PiggyBankLegends,
+    PiggyBankKTD,
+    SongEvents,
+)
+
+for sync_model in SYNC_MODELS:
+    Index(f'ix_{sync_model.__tablename__}_dt_update', sync_model.__table__.c.dt_update)
+
+
+@dataclass(frozen=True)
+class ModelMeta:
+    """
+    Метаданные модели, которые вычисляются один раз при импорте,
+    чтобы не вызывать inspect(model) и не собирать одни и те же запросы на каждый вызов CRUD
+    """
+    primary_key: InstrumentedAttribute
+    column_keys: FrozenSet[str]
+    column_names: Tuple[str, ...]
+    column_attrs: Tuple[InstrumentedAttribute, ...]
+
+    select_all: Select
+    select_by_id: Select
+    select_by_ids: Select
+
+    # Те же запросы по колонкам: возвращают строки без создания ORM объектов
+    select_rows_all: Select
+    select_rows_by_id: Select
+    select_rows_by_ids: Select
+
+    @classmethod
+    def from_model(
+            cls,
+            model: Type[Base]
+    ) -> 'ModelMeta':
+        mapper = inspect(model)
+        primary_key = getattr(model, mapper.primary_key[0].key)
+        column_names = tuple(attr.key for attr in mapper.column_attrs)
+        column_attrs = tuple(getattr(model, key) for key in column_names)
+
+        return cls(
+            primary_key=primary_key,
+            column_keys=frozenset(column_names),
+            column_names=column_names,
+            column_attrs=column_attrs,
+            select_all=select(model),
+            select_by_id=select(model).where(primary_key == bindparam('pk_value')),
+            select_by_ids=select(model).where(primary_key.in_(bindparam('pk_values', expanding=True))),
+            select_rows_all=select(*column_attrs),
+            select_rows_by_id=select(*column_attrs).where(primary_key == bindparam('pk_value')),
+            select_rows_by_ids=select(*column_attrs).where(primary_key.in_(bindparam('pk_values', expanding=True))),
+        )
+
+
+models_meta: Dict[Type[Base], ModelMeta] = {
+    mapper.class_: ModelMeta.from_model(mapper.class_) for mapper in Base.registry.mappers
+}
@@ -0,0 +1,184 @@
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional
+
+from prometheus_client import Gauge
+from sqlalchemy import insert, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common_lib.logger import logger
+from .db_connection import postgres_db
+from .models import Requests, RequestsDailyRollup
+
+from config import REQUESTS_BUFFER_FLUSH_INTERVAL_MS, REQUESTS_BUFFER_MAX_ROWS, REQUESTS_BUFFER_MAX_PENDING_ROWS
+
+requests_buffer_depth = Gauge(
+    name='requests_buffer_depth',
+    documentation='Количество записей Requests, ожидающих вставки в БД'
+)
+
+
+class RequestsBuffer:
+    """
+    Буфер отложенной записи запросов пользователей.
+    Копит строки Requests в памяти и вставляет их одним многострочным INSERT
+    раз в flush_interval_ms миллисекунд или при накоплении max_rows строк.
+    В той же транзакции (в точке сохранения) пополняет дневные счетчики RequestsDailyRollup.
+    Если вставка не удалась, строки возвращаются в буфер, но в нем хранится не больше max_pending_rows строк
+    """
+
+    def __init__(
+            self,
+            flush_interval_ms: int,
+            max_rows: int,
+            max_pending_rows: int
+    ):
+        self._flush_interval = flush_interval_ms / 1000
+        self._max_rows = max_rows
+        self._max_pending_rows = max_pending_rows
+
+        self._rows: List[Dict] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows)
+
+    async def add(
+            self,
+            rows: List[Dict]
+    ) -> None:
+        self._rows.extend(rows)
+        requests_buffer_depth.set(self.depth)
+
+        if self.depth >= self._max_rows:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._rows:
+                # Забираем не больше max_rows строк, чтобы не упереться в лимит параметров запроса
+                rows, self._rows = self._rows[:self._max_rows], self._rows[self._max_rows:]
+                requests_buffer_depth.set(self.depth)
+
+                try:
+                    async with postgres_db.db_session() as session:
+                        async with session.begin():
+                            await session.execute(insert(Requests).values(rows))
+
+                            if rollup_rows := self.get_rollup_rows(rows):
+                                await self.upsert_rollup(session, rollup_rows)
+
+                except Exception as e:
+                    logger.error(f'Не удалось записать {len(rows)} запросов пользователей: {e}')
+                    self._restore(rows)
+                    return
+
+    def _restore(
+            self,
+            rows: List[Dict]
+    ) -> None:
+        """
+        Возвращает строки неудавшейся вставки в начало буфера.
+        При переполнении отбрасываются самые старые строки
+        """
+        self._rows = rows + self._rows
+
+        if (overflow := self.depth - self._max_pending_rows) > 0:
+            logger.error(f'Буфер запросов пользователей переполнен, отброшено {overflow} записей')
+            self._rows = self._rows[overflow:]
+
+        requests_buffer_depth.set(self.depth)
+
+    @staticmethod
+    def get_rollup_rows(rows: List[Dict]) -> List[Dict]:
+        counts = Counter()
+        display_values = {}
+
+        for row in rows:
+            if row.get('id_request_type') is None or row.get('id_content') is None:
+                continue
+
+            key = (row['id_request_type'], row['id_content'])
+            counts[key] += 1
+            display_values[key] = row.get('content_display_value')
+
+        # День берется из БД, чтобы совпадать с dt_create записей Requests
+        return [
+            {
+                'id_request_type': id_request_type,
+                'id_content': id_content,
+                'day': func.current_date(),
+                'count': count,
+                'content_display_value': display_values[(id_request_type, id_content)]
+            } for (id_request_type, id_content), count in counts.items()
+        ]
+
+    async def upsert_rollup(
+            self,
+            session: AsyncSession,
+            rollup_rows: List[Dict]
+    ) -> None:
+        """
+        Счетчики пополняются в точке сохранения: ошибка в них не откатывает вставку самих запросов
+        """
+        try:
+            async with session.begin_nested():
+                await session.execute(self.get_rollup_upsert(rollup_rows))
+
+        except Exception as e:
+            logger.error(f'Не удалось обновить дневные счетчики запросов: {e}')
+
+    @staticmethod
+    def get_rollup_upsert(rollup_rows: List[Dict]):
+        query = pg_insert(RequestsDailyRollup).values(rollup_rows)
+
+        return query.on_conflict_do_update(
+            index_elements=[
+                RequestsDailyRollup.id_request_type,
+                RequestsDailyRollup.id_content,
+                RequestsDailyRollup.day
+            ],
+            set_={
+                'count': RequestsDailyRollup.count + query.excluded.count,
+                'content_display_value': query.excluded.content_display_value,
+                'dt_update': func.now()
+            }
+        )
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическую запись и дописывает все, что осталось в буфере.
+        Цикл не отменяется, а дожидается окончания текущей записи, чтобы не потерять взятые из буфера строки
+        """
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+        if self.depth:
+            logger.error(f'При остановке не записано {self.depth} запросов пользователей')
+
+
+requests_buffer = RequestsBuffer(
+    flush_interval_ms=REQUESTS_BUFFER_FLUSH_INTERVAL_MS,
+    max_rows=REQUESTS_BUFFER_MAX_ROWS,
+    max_pending_rows=REQUESTS_BUFFER_MAX_PENDING_ROWS
+)
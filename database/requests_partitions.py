@@ -0,0 +1,147 @@
+import asyncio
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from common_lib.logger import logger
+from .db_connection import postgres_db
+
+from config import (
+    REQUESTS_PARTITIONS_MONTHS_AHEAD,
+    REQUESTS_PARTITIONS_CHECK_INTERVAL_HOURS,
+    REQUESTS_RETENTION_MONTHS,
+    REQUESTS_RETENTION_MODE
+)
+
+PARTITION_NAME_PATTERN = re.compile(r'^Requests_y(\d{4})m(\d{2})$')
+
+
+def add_months(
+        month: date,
+        months: int
+) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_partition_name(
+        month: date
+) -> str:
+    return f'Requests_y{month.year}m{month.month:02d}'
+
+
+def get_create_partition_sql(
+        month: date
+) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{get_partition_name(month)}" PARTITION OF "Requests" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+class RequestsPartitionManager:
+    """
+    Обслуживание месячных секций таблицы Requests:
+    заранее создает секции на months_ahead месяцев вперед и
+    отсоединяет секции старше retention_months месяцев.
+    """
+
+    def __init__(
+            self,
+            months_ahead: int,
+            check_interval_hours: int,
+            retention_months: int,
+            retention_mode: str
+    ):
+        self._months_ahead = months_ahead
+        self._check_interval = check_interval_hours * 60 * 60
+        self._retention_months = retention_months
+        self._retention_mode = retention_mode
+
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def get_current_month(session) -> date:
+        # Месяц берется из БД, так же как dt_create новых записей
+        return (await session.scalar(text('SELECT current_date'))).replace(day=1)
+
+    @staticmethod
+    async def get_partitions(session) -> List[date]:
+        result = await session.execute(
+            text(
+                '''
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'Requests'
+                '''
+            )
+        )
+
+        return sorted(
+            date(int(match.group(1)), int(match.group(2)), 1)
+            for name in result.scalars() if (match := PARTITION_NAME_PATTERN.match(name))
+        )
+
+    async def create_partitions(self) -> None:
+        async with postgres_db.db_session() as session:
+            async with session.begin():
+                current_month = await self.get_current_month(session)
+
+                for months in range(self._months_ahead + 1):
+                    await session.execute(text(get_create_partition_sql(add_months(current_month, months))))
+
+    async def apply_retention(self) -> None:
+        if self._retention_months <= 0:
+            return
+
+        async with postgres_db.db_session() as session:
+            async with session.begin():
+                oldest_month = add_months(await self.get_current_month(session), -self._retention_months)
+
+                for month in await self.get_partitions(session):
+                    if month >= oldest_month:
+                        continue
+
+                    name = get_partition_name(month)
+                    await session.execute(text(f'ALTER TABLE "Requests" DETACH PARTITION "{name}"'))
+
+                    if self._retention_mode == 'drop':
+                        await session.execute(text(f'DROP TABLE "{name}"'))
+                    else:
+                        await session.execute(text(f'ALTER TABLE "{name}" RENAME TO "Archive{name}"'))
+
+                    logger.info(f'Секция {name} исключена из Requests ({self._retention_mode})')
+
+    async def run_maintenance(self) -> None:
+        try:
+            await self.create_partitions()
+            await self.apply_retention()
+
+        except Exception as e:
+            logger.error(f'Не удалось обслужить секции Requests: {e}')
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_maintenance()
+            await asyncio.sleep(self._check_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+requests_partition_manager = RequestsPartitionManager(
+    months_ahead=REQUESTS_PARTITIONS_MONTHS_AHEAD,
+    check_interval_hours=REQUESTS_PARTITIONS_CHECK_INTERVAL_HOURS,
+    retention_months=REQUESTS_RETENTION_MONTHS,
+    retention_mode=REQUESTS_RETENTION_MODE
+)
@@ -0,0 +1,47 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import Table, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_connection import postgres_db
+
+
+async def read_tables_version(
+        session: AsyncSession,
+        tables: Iterable[Table]
+) -> Dict[str, str]:
+    """
+    Версии таблиц одним запросом в переданной сессии (например, в транзакции, из которой читаются сами строки)
+    """
+    queries = [
+        select(
+            literal(table.name).label('table_name'),
+            func.count().label('count'),
+            func.max(table.c.dt_update).label('max_dt_update')
+        ).select_from(
+            table
+        ) for table in tables
+    ]
+
+    result = await session.execute(
+        union_all(*queries) if len(queries) > 1 else queries[0]
+    )
+
+    return {
+        row.table_name: f'{row.table_name}:{row.count}:{row.max_dt_update.isoformat() if row.max_dt_update else ""}'
+        for row in result
+    }
+
+
+async def get_tables_version(
+        tables: Iterable[Table]
+) -> Dict[str, str]:
+    """
+    Версии таблиц для ETag одним запросом: версия меняется при вставке и удалении (count)
+    и при обновлении (max(dt_update))
+    """
+    async with postgres_db.db_session() as session:
+        return await read_tables_version(
+            session=session,
+            tables=tables
+        )
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 
 from fastapi import FastAPI
@@ -9,8 +11,36 @@ from routers.methodical_book.router import methodical_book_router
 from routers.auth.router import auth_router
 from routers.statistic.router import statistic_router
 from routers.song_event. router import song_event_router
+from routers.sync.router import sync_router
+from routers.export.router import export_router
+from routers.batch.router import batch_router
+from routers.middleware import QueryStatsMiddleware, CompressionMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
-app = FastAPI()
+from database.requests_buffer import requests_buffer
+from database.identity_cache import identity_cache
+from database.requests_partitions import requests_partition_manager
+from common_lib.cache import response_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await identity_cache.load_request_types()
+    await identity_cache.load_known_users()
+    requests_buffer.start()
+    requests_partition_manager.start()
+    response_cache.start()
+
+    yield
+
+    requests_partition_manager.stop()
+    await requests_buffer.stop()
+    await response_cache.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(
     router=song_router,
@@ -44,6 +74,18 @@ app.include_router(
     router=auth_router
 )
 
+app.include_router(
+    router=sync_router
+)
+
+app.include_router(
+    router=export_router
+)
+
+app.include_router(
+    router=batch_router
+)
+
 Instrumentator().instrument(app).expose(app)
 
 @app.get('/')
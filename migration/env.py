@@ -32,6 +32,16 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Секции Requests и их архивы создаются задачей обслуживания, а не моделями
+    if type_ == 'table' and reflected and compare_to is None and name.startswith(('Requests_', 'ArchiveRequests_')):
+        return False
+
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -54,6 +64,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -77,7 +88,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,45 @@
+"""piggy bank game lookup
+
+Revision ID: 29f8066a5dcd
+Revises: 990a509cec2f
+Create Date: 2026-10-19 17:56:36.808322
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '29f8066a5dcd'
+down_revision: Union[str, None] = '990a509cec2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'PiggyBankGameLookup',
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('type_id', sa.Integer(), nullable=False),
+        sa.Column('game_id', sa.Integer(), nullable=False),
+        sa.Column('dt_create', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('dt_update', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['game_id'], ['PiggyBankGames.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('group_id', 'type_id', 'game_id')
+    )
+
+    op.execute(
+        '''
+        INSERT INTO "PiggyBankGameLookup"(group_id, type_id, game_id)
+        SELECT DISTINCT groups.group_id, types.type_id, groups.game_id
+        FROM "PiggyBankGroupForGame" groups
+        JOIN "PiggyBankTypesGamesForGame" types ON types.game_id = groups.game_id
+        WHERE groups.group_id IS NOT NULL AND types.type_id IS NOT NULL AND groups.game_id IS NOT NULL
+        '''
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('PiggyBankGameLookup')
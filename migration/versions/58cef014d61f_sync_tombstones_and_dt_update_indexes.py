@@ -0,0 +1,54 @@
+"""sync tombstones and dt_update indexes
+
+Revision ID: 58cef014d61f
+Revises: f4b745429190
+Create Date: 2026-10-19 18:05:19.476957
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+SYNC_TABLES = (
+    'Songs',
+    'CategorySong',
+    'MethodicalBookChapters',
+    'PiggyBankGroups',
+    'PiggyBankTypesGame',
+    'PiggyBankGames',
+    'PiggyBankLegends',
+    'PiggyBankKTD',
+    'SongEvents',
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '58cef014d61f'
+down_revision: Union[str, None] = 'f4b745429190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'Tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('dt_create', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('dt_update', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_Tombstones_dt_create', 'Tombstones', ['dt_create'], unique=False)
+
+    for table in SYNC_TABLES:
+        op.create_index(f'ix_{table}_dt_update', table, ['dt_update'], unique=False)
+
+
+def downgrade() -> None:
+    for table in SYNC_TABLES:
+        op.drop_index(f'ix_{table}_dt_update', table_name=table)
+
+    op.drop_index('ix_Tombstones_dt_create', table_name='Tombstones')
+    op.drop_table('Tombstones')
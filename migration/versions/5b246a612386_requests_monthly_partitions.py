@@ -0,0 +1,110 @@
+"""requests monthly partitions
+
+Revision ID: 5b246a612386
+Revises: fabea6ab4851
+Create Date: 2026-10-19 18:02:21.394659
+
+"""
+from typing import Sequence, Union
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+MONTHS_AHEAD = 3
+
+REQUESTS_COLUMNS = 'id, dt_create, id_user, id_request_type, id_content, content_display_value, dt_update'
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b246a612386'
+down_revision: Union[str, None] = 'fabea6ab4851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # Старая таблица освобождает имена индекса, первичного ключа и последовательность id
+    op.rename_table('Requests', 'Requests_old')
+    op.execute('ALTER TABLE "Requests_old" RENAME CONSTRAINT "Requests_pkey" TO "Requests_old_pkey"')
+    op.drop_index('ix_Requests_id_user', table_name='Requests_old')
+    op.execute('ALTER SEQUENCE "Requests_id_seq" OWNED BY NONE')
+
+    op.create_table(
+        'Requests',
+        sa.Column('id', sa.Integer(), server_default=sa.text('nextval(\'"Requests_id_seq"\'::regclass)'), nullable=False),
+        sa.Column('dt_create', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('id_user', sa.Integer(), nullable=True),
+        sa.Column('id_request_type', sa.Integer(), nullable=True),
+        sa.Column('id_content', sa.Integer(), nullable=True),
+        sa.Column('content_display_value', sa.String(length=100), nullable=True),
+        sa.Column('dt_update', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['id_request_type'], ['RequestTypes.id'], ),
+        sa.ForeignKeyConstraint(['id_user'], ['TelegramUsers.id'], ),
+        sa.PrimaryKeyConstraint('id', 'dt_create'),
+        postgresql_partition_by='RANGE (dt_create)'
+    )
+    op.execute('ALTER SEQUENCE "Requests_id_seq" OWNED BY "Requests".id')
+    op.create_index('ix_Requests_id_user', 'Requests', ['id_user'], unique=False)
+
+    connection = op.get_bind()
+    current_month = connection.scalar(sa.text("SELECT date_trunc('month', current_date)::date"))
+    first_month = connection.scalar(
+        sa.text('SELECT date_trunc(\'month\', min(dt_create))::date FROM "Requests_old"')
+    ) or current_month
+
+    month = first_month
+    while month <= add_months(current_month, MONTHS_AHEAD):
+        op.execute(
+            f'CREATE TABLE "Requests_y{month.year}m{month.month:02d}" PARTITION OF "Requests" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute('CREATE TABLE "Requests_default" PARTITION OF "Requests" DEFAULT')
+
+    op.execute(
+        f'''
+        INSERT INTO "Requests"({REQUESTS_COLUMNS})
+        SELECT id, coalesce(dt_create, now()), id_user, id_request_type, id_content, content_display_value, dt_update
+        FROM "Requests_old"
+        '''
+    )
+    op.drop_table('Requests_old')
+
+
+def downgrade() -> None:
+    op.execute('ALTER SEQUENCE "Requests_id_seq" OWNED BY NONE')
+    op.rename_table('Requests', 'Requests_partitioned')
+    op.execute('ALTER TABLE "Requests_partitioned" RENAME CONSTRAINT "Requests_pkey" TO "Requests_partitioned_pkey"')
+    op.drop_index('ix_Requests_id_user', table_name='Requests_partitioned')
+
+    op.create_table(
+        'Requests',
+        sa.Column('id', sa.Integer(), server_default=sa.text('nextval(\'"Requests_id_seq"\'::regclass)'), nullable=False),
+        sa.Column('id_user', sa.Integer(), nullable=True),
+        sa.Column('id_request_type', sa.Integer(), nullable=True),
+        sa.Column('id_content', sa.Integer(), nullable=True),
+        sa.Column('content_display_value', sa.String(length=100), nullable=True),
+        sa.Column('dt_create', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('dt_update', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['id_request_type'], ['RequestTypes.id'], ),
+        sa.ForeignKeyConstraint(['id_user'], ['TelegramUsers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE "Requests_id_seq" OWNED BY "Requests".id')
+    op.create_index('ix_Requests_id_user', 'Requests', ['id_user'], unique=False)
+
+    op.execute(
+        f'''
+        INSERT INTO "Requests"({REQUESTS_COLUMNS})
+        SELECT {REQUESTS_COLUMNS} FROM "Requests_partitioned"
+        '''
+    )
+    op.drop_table('Requests_partitioned')
@@ -0,0 +1,85 @@
+"""piggy bank game lookup triggers
+
+Revision ID: 6796c04ac79f
+Revises: 58cef014d61f
+Create Date: 2026-10-19 19:12:41.503217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+ASSOCIATION_TABLES = ('PiggyBankGroupForGame', 'PiggyBankTypesGamesForGame')
+
+# (операция, таблицы переходов)
+TRIGGER_OPERATIONS = (
+    ('INSERT', 'NEW TABLE AS new_rows'),
+    ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('DELETE', 'OLD TABLE AS old_rows'),
+)
+
+# revision identifiers, used by Alembic.
+revision: str = '6796c04ac79f'
+down_revision: Union[str, None] = '58cef014d61f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        '''
+        CREATE OR REPLACE FUNCTION "refresh_PiggyBankGameLookup"() RETURNS trigger AS $$
+        DECLARE
+            game_ids integer[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                game_ids := ARRAY(SELECT game_id FROM new_rows);
+            ELSIF TG_OP = 'DELETE' THEN
+                game_ids := ARRAY(SELECT game_id FROM old_rows);
+            ELSE
+                game_ids := ARRAY(SELECT game_id FROM old_rows UNION SELECT game_id FROM new_rows);
+            END IF;
+
+            DELETE FROM "PiggyBankGameLookup" WHERE game_id IN (SELECT unnest(game_ids));
+
+            INSERT INTO "PiggyBankGameLookup"(group_id, type_id, game_id)
+            SELECT DISTINCT groups.group_id, types.type_id, groups.game_id
+            FROM "PiggyBankGroupForGame" groups
+            JOIN "PiggyBankTypesGamesForGame" types ON types.game_id = groups.game_id
+            WHERE groups.game_id IN (SELECT unnest(game_ids))
+                AND groups.group_id IS NOT NULL AND types.type_id IS NOT NULL
+            ON CONFLICT DO NOTHING;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        '''
+    )
+
+    for table in ASSOCIATION_TABLES:
+        for operation, transition in TRIGGER_OPERATIONS:
+            op.execute(
+                f'CREATE TRIGGER "{table}_lookup_{operation.lower()}" AFTER {operation} ON "{table}" '
+                f'REFERENCING {transition} FOR EACH STATEMENT EXECUTE FUNCTION "refresh_PiggyBankGameLookup"()'
+            )
+
+    # Связи могли измениться через обновление после заполнения таблицы, пересобираем ее один раз
+    op.execute('DELETE FROM "PiggyBankGameLookup"')
+    op.execute(
+        '''
+        INSERT INTO "PiggyBankGameLookup"(group_id, type_id, game_id)
+        SELECT DISTINCT groups.group_id, types.type_id, groups.game_id
+        FROM "PiggyBankGroupForGame" groups
+        JOIN "PiggyBankTypesGamesForGame" types ON types.game_id = groups.game_id
+        WHERE groups.group_id IS NOT NULL AND types.type_id IS NOT NULL AND groups.game_id IS NOT NULL
+        '''
+    )
+
+
+def downgrade() -> None:
+    for table in ASSOCIATION_TABLES:
+        for operation, _ in TRIGGER_OPERATIONS:
+            op.execute(f'DROP TRIGGER "{table}_lookup_{operation.lower()}" ON "{table}"')
+
+    op.execute('DROP FUNCTION "refresh_PiggyBankGameLookup"()')
@@ -0,0 +1,26 @@
+"""SongEvents end_dt index
+
+Revision ID: 7a8b78e66ba3
+Revises: 
+Create Date: 2026-10-19 17:52:55.938824
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a8b78e66ba3'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_SongEvents_end_dt', 'SongEvents', ['end_dt'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_SongEvents_end_dt', table_name='SongEvents')
@@ -0,0 +1,68 @@
+"""association tables indexes
+
+Revision ID: 990a509cec2f
+Revises: 7a8b78e66ba3
+Create Date: 2026-10-19 17:53:55.165136
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# (таблица, колонка сущности, колонка связи)
+ASSOCIATION_TABLES = (
+    ('PiggyBankGroupForGame', 'game_id', 'group_id'),
+    ('PiggyBankTypesGamesForGame', 'game_id', 'type_id'),
+    ('PiggyBankGroupsForLegend', 'legend_id', 'group_id'),
+    ('PiggyBankGroupsForKTD', 'ktd_id', 'group_id'),
+)
+
+TITLE_INDEXED_TABLES = ('PiggyBankGames', 'PiggyBankLegends', 'PiggyBankKTD')
+
+# revision identifiers, used by Alembic.
+revision: str = '990a509cec2f'
+down_revision: Union[str, None] = '7a8b78e66ba3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table, entity_column, link_column in ASSOCIATION_TABLES + (('SongsForSongsEvent', 'event_id', 'song_id'),):
+        # Перед созданием уникального индекса удаляем дубли связей, оставляя запись с меньшим id
+        op.execute(
+            f'''
+            DELETE FROM "{table}" a
+            USING "{table}" b
+            WHERE a.id > b.id
+              AND a.{entity_column} = b.{entity_column}
+              AND a.{link_column} = b.{link_column}
+            '''
+        )
+        op.create_index(f'uq_{table}_{entity_column}_{link_column}', table, [entity_column, link_column], unique=True)
+
+    for table, entity_column, link_column in ASSOCIATION_TABLES:
+        op.create_index(f'ix_{table}_{link_column}_{entity_column}', table, [link_column, entity_column])
+
+    op.create_index('ix_SongsForSongsEvent_song_id', 'SongsForSongsEvent', ['song_id'])
+    op.create_index('ix_Songs_category', 'Songs', ['category'])
+    op.create_index('ix_Requests_id_user', 'Requests', ['id_user'])
+
+    # Проверка дублей при создании сущностей копилки идет по названию
+    for table in TITLE_INDEXED_TABLES:
+        op.create_index(f'ix_{table}_title', table, ['title'])
+
+
+def downgrade() -> None:
+    for table in TITLE_INDEXED_TABLES:
+        op.drop_index(f'ix_{table}_title', table_name=table)
+
+    op.drop_index('ix_Requests_id_user', table_name='Requests')
+    op.drop_index('ix_Songs_category', table_name='Songs')
+    op.drop_index('ix_SongsForSongsEvent_song_id', table_name='SongsForSongsEvent')
+
+    for table, entity_column, link_column in ASSOCIATION_TABLES:
+        op.drop_index(f'ix_{table}_{link_column}_{entity_column}', table_name=table)
+
+    for table, entity_column, link_column in ASSOCIATION_TABLES + (('SongsForSongsEvent', 'event_id', 'song_id'),):
+        op.drop_index(f'uq_{table}_{entity_column}_{link_column}', table_name=table)
@@ -0,0 +1,26 @@
+"""reviews looked status index
+
+Revision ID: f4b745429190
+Revises: 5b246a612386
+Create Date: 2026-10-19 18:03:39.697170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b745429190'
+down_revision: Union[str, None] = '5b246a612386'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_Reviews_looked_status_id', 'Reviews', ['looked_status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Reviews_looked_status_id', table_name='Reviews')
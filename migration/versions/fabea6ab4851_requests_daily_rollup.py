@@ -0,0 +1,54 @@
+"""requests daily rollup
+
+Revision ID: fabea6ab4851
+Revises: 29f8066a5dcd
+Create Date: 2026-10-19 18:01:04.491779
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fabea6ab4851'
+down_revision: Union[str, None] = '29f8066a5dcd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'RequestsDailyRollup',
+        sa.Column('id_request_type', sa.Integer(), nullable=False),
+        sa.Column('id_content', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('content_display_value', sa.String(length=100), nullable=True),
+        sa.Column('dt_create', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('dt_update', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['id_request_type'], ['RequestTypes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id_request_type', 'id_content', 'day')
+    )
+    op.create_index(
+        'ix_RequestsDailyRollup_id_request_type_day',
+        'RequestsDailyRollup',
+        ['id_request_type', 'day'],
+        unique=False
+    )
+
+    op.execute(
+        '''
+        INSERT INTO "RequestsDailyRollup"(id_request_type, id_content, day, count, content_display_value)
+        SELECT id_request_type, id_content, dt_create::date, count(*), max(content_display_value)
+        FROM "Requests"
+        WHERE id_request_type IS NOT NULL AND id_content IS NOT NULL AND dt_create IS NOT NULL
+        GROUP BY id_request_type, id_content, dt_create::date
+        '''
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_RequestsDailyRollup_id_request_type_day', table_name='RequestsDailyRollup')
+    op.drop_table('RequestsDailyRollup')
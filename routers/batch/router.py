@@ -0,0 +1,179 @@
+import asyncio
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlencode
+
+import orjson
+from fastapi import APIRouter, Body, Request
+from starlette.responses import Response
+from starlette.types import Message
+
+import config
+from common_lib.logger import logger
+from schemas.batch import BatchQuery, BatchRequest, BatchResponse, QueryParamValue
+
+batch_router = APIRouter(prefix='/batch', tags=['batch'])
+
+# Ключи scope родительского запроса, которые нужны маршрутам приложения при вызове подзапроса
+INHERITED_SCOPE_KEYS = (
+    'asgi',
+    'http_version',
+    'scheme',
+    'server',
+    'client',
+    'root_path',
+    'app',
+    'state',
+    'starlette.exception_handlers',
+)
+
+# Пути, доступные в пакетном запросе: только чтение каталога без побочных эффектов.
+# Файлы, статистика, отзывы (is_only_new помечает их прочитанными) и синхронизация в пакет не попадают
+BATCH_PATHS = frozenset((
+    '/songs/',
+    '/songs/by_category/',
+    '/songs/search/',
+    '/songs/categories/',
+    '/songs/categories/childrens/',
+    '/songs/categories/tree/',
+    '/song-events/',
+    '/piggy_bank/groups/',
+    '/piggy_bank/types_game/',
+    '/piggy_bank/games/',
+    '/piggy_bank/games/by_type_group/',
+    '/piggy_bank/legends/',
+    '/piggy_bank/legends/by_group/',
+    '/piggy_bank/ktd/',
+    '/piggy_bank/ktd/by_group/',
+    '/methodical_book/',
+    '/methodical_book/childrens/',
+    '/methodical_book/tree/',
+))
+
+# Параметры, с которыми эндпоинт записывает запрос пользователя в БД
+BATCH_FORBIDDEN_PARAMS = frozenset((
+    'is_create_user_request',
+    'tg_user_id',
+))
+
+
+def encode_param(
+        value: QueryParamValue
+) -> Union[str, List[str]]:
+    """
+    Значение параметра строки запроса в том виде, в котором его передает HTTP клиент (bool как true/false)
+    """
+    if isinstance(value, list):
+        return [encode_param(item) for item in value]
+
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+
+    return str(value)
+
+
+async def execute_query(
+        request: Request,
+        query: BatchQuery
+) -> Tuple[int, bytes]:
+    """
+    Выполняет подзапрос через маршрутизатор приложения без сети и без middleware:
+    кэш ответов, проверка параметров и обработчики ошибок работают так же, как при отдельном запросе
+    """
+    scope = {key: request.scope[key] for key in INHERITED_SCOPE_KEYS if key in request.scope}
+    scope.update({
+        'type': 'http',
+        'method': 'GET',
+        'path': query.path,
+        'raw_path': query.path.encode(),
+        'query_string': urlencode(
+            {name: encode_param(value) for name, value in query.params.items()},
+            doseq=True
+        ).encode(),
+        'headers': [(b'accept', b'application/json')],
+    })
+    status = 500
+    chunks = []
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal request_sent
+
+        if request_sent:
+            await response_complete.wait()
+            return {'type': 'http.disconnect'}
+
+        request_sent = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+
+            if not message.get('more_body', False):
+                response_complete.set()
+
+    await request.app.router(scope, receive, send)
+
+    return status, b''.join(chunks)
+
+
+@batch_router.post(
+    path='/',
+    response_model=BatchResponse,
+    summary='Выполнить несколько запросов на чтение одним вызовом'
+)
+async def execute_batch(
+        request: Request,
+        batch: BatchRequest = Body(
+            description="Именованные подзапросы к GET эндпоинтам"
+        )
+):
+    """
+    Подзапросы выполняются конкурентно, одновременно не больше BATCH_MAX_CONCURRENCY.
+    Ошибка подзапроса не прерывает пакет: у каждого результата свой статус
+    """
+    semaphore = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+
+    async def run(query: BatchQuery) -> Dict:
+        if query.path not in BATCH_PATHS:
+            return {
+                'status': 404,
+                'error': {'detail': f'Путь {query.path} недоступен в пакетном запросе'}
+            }
+
+        if forbidden_params := sorted(BATCH_FORBIDDEN_PARAMS & query.params.keys()):
+            return {
+                'status': 400,
+                'error': {'detail': f'Параметры {", ".join(forbidden_params)} недоступны в пакетном запросе'}
+            }
+
+        async with semaphore:
+            try:
+                status, body = await execute_query(request, query)
+            except Exception as e:
+                logger.error(f'Ошибка подзапроса {query.name} к {query.path} в пакетном запросе {e}')
+                return {
+                    'status': 500,
+                    'error': {'detail': 'Произошла ошибка на сервере'}
+                }
+
+        # Тело подзапроса уже в JSON и вставляется в ответ без повторного разбора
+        return {
+            'status': status,
+            'data' if status < 400 else 'error': orjson.Fragment(body) if body else None
+        }
+
+    results = await asyncio.gather(*(run(query) for query in batch.queries))
+
+    return Response(
+        content=orjson.dumps({
+            'results': {query.name: result for query, result in zip(batch.queries, results)}
+        }),
+        media_type='application/json'
+    )
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse
+
+from common_lib.cache import is_not_modified
+from database.cruds import ExportCruds
+
+export_router = APIRouter(prefix='/export', tags=['export'])
+
+
+@export_router.get(
+    path='/snapshot/',
+    summary='Выгрузить весь каталог в виде NDJSON, сжатого gzip',
+    response_class=StreamingResponse,
+    responses={
+        200: {'content': {'application/x-ndjson': {}}},
+        304: {'description': 'Каталог не изменился с переданного ETag'}
+    }
+)
+async def get_snapshot(
+        request: Request
+):
+    snapshot = ExportCruds.stream_snapshot()
+    etag = await anext(snapshot)
+
+    if is_not_modified(request, etag):
+        await snapshot.aclose()
+
+        return Response(
+            status_code=304,
+            headers={'ETag': etag}
+        )
+
+    return StreamingResponse(
+        content=snapshot,
+        media_type='application/x-ndjson',
+        headers={
+            'ETag': etag,
+            'Content-Encoding': 'gzip',
+            'Content-Disposition': 'attachment; filename="snapshot.ndjson.gz"'
+        }
+    )
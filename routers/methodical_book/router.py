@@ -1,20 +1,21 @@
 import urllib.parse
 
-from fastapi import APIRouter, UploadFile, Form, File, HTTPException
+from fastapi import APIRouter, UploadFile, Form, File, HTTPException, Request
 from fastapi.params import Query, Body
 
 from starlette.responses import JSONResponse, Response
 
 from common_lib.file_storage.file_manager import file_manager
+from common_lib.cache import cache_response, is_not_modified
 from schemas import methodical_book as mb_schemes
 
 from database import models
-from database.cruds import CRUDManagerSQL
+from database.cruds import CRUDManagerSQL, MethodicalBookCruds
 
 from typing import Annotated, List, Optional
 
 from schemas.service import AdditionalPath
-from schemas.responses import ResponseData, Meta, ResponseDelete, ResponseCreate
+from schemas.responses import ResponseData, FastResponseData, Meta, ResponseDelete, ResponseCreate
 
 methodical_book_router = APIRouter(prefix='/methodical_book', tags=['methodical_book'])
 
@@ -24,6 +25,7 @@ methodical_book_router = APIRouter(prefix='/methodical_book', tags=['methodical_
     response_model=ResponseData[mb_schemes.MethodicalChaptersResponse],
     summary='Получить главы книги'
 )
+@cache_response(tags=[models.MethodicalBookChapters.__tablename__])
 async def get_chapter(
     id_chapter: Annotated[List[int], Query(
         description="Список id категорий"
@@ -34,15 +36,15 @@ async def get_chapter(
 ):
     row_filter = {"parent_id": None} if only_parents else {}
 
-    chapters = await CRUDManagerSQL.get_data(
+    chapters = await CRUDManagerSQL.get_rows(
         model=models.MethodicalBookChapters,
         row_id=id_chapter,
         row_filter=row_filter
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=chapters,
-        meta=Meta(total=len(chapters))
+        adapter=mb_schemes.methodical_chapter_list_adapter
     )
 
 
@@ -51,22 +53,49 @@ async def get_chapter(
     response_model=ResponseData[mb_schemes.MethodicalChaptersResponse],
     summary='Получить дочерние главы глав'
 )
+@cache_response(tags=[models.MethodicalBookChapters.__tablename__])
 async def get_child_chapters(
         id_chapter: Annotated[int, Query(
             description="Id главы, детей которой нужно получить"
         )]
 ):
 
-    chapters = await CRUDManagerSQL.get_data(
+    chapters = await CRUDManagerSQL.get_rows(
         model=models.MethodicalBookChapters,
         row_filter={
             'parent_id': id_chapter
         }
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=chapters,
-        meta=Meta(total=len(chapters))
+        adapter=mb_schemes.methodical_chapter_list_adapter
+    )
+
+
+@methodical_book_router.get(
+    path='/tree/',
+    response_model=ResponseData[mb_schemes.MethodicalChapterTreeResponse],
+    summary='Получить оглавление книги целиком',
+    responses={304: {'description': 'Оглавление не изменилось с переданного ETag'}}
+)
+async def get_chapters_tree(
+        request: Request,
+        response: Response
+):
+    etag, tree = await MethodicalBookCruds.get_chapters_tree()
+
+    if is_not_modified(request, etag):
+        return Response(
+            status_code=304,
+            headers={'ETag': etag}
+        )
+
+    response.headers['ETag'] = etag
+
+    return ResponseData(
+        data=tree,
+        meta=Meta(total=len(tree))
     )
 
 
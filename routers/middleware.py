@@ -1,7 +1,16 @@
+import hashlib
 from functools import wraps
+from typing import Optional, Tuple
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import config
+from common_lib.cache import CACHE_TAGS_SCOPE_KEY, response_cache
+from common_lib.compression import StreamCompressor, compress, get_response_encoding, is_compressible
 from database import models
 from database.cruds import CRUDManagerSQL
+from database.instrumentation import QueryStats, query_stats
 from schemas.service import RequestCreate
 
 
@@ -29,4 +38,144 @@ def insert_user_request(func):
             )
 
         return result
-    return wrapperну
\ No newline at end of file
+    return wrapperну
+
+
+class QueryStatsMiddleware:
+    """
+    Считает SQL запросы каждого HTTP запроса, отдает их в заголовке Server-Timing
+    и в гистограммы Prometheus с меткой маршрута
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(scope=scope)
+        token = query_stats.set(stats)
+
+        async def send_with_server_timing(message: Message):
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('Server-Timing', stats.get_server_timing())
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            query_stats.reset(token)
+            stats.observe()
+
+
+class CompressionMiddleware:
+    """
+    Сжимает текстовые ответы (JSON, текст песен) в br, zstd или gzip по Accept-Encoding клиента.
+    Ответы меньше minimum_size, файлы и уже сжатые ответы (Content-Encoding) отдаются как есть.
+    Сжатое тело ответа cache_response (кэшируемые справочники) сохраняется в response_cache
+    по хэшу исходного тела с тегами ответа, чтобы не сжимать горячие ответы повторно
+    и сбрасывать сжатые тела вместе с ответами при записи в таблицы
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = config.COMPRESSION_MINIMUM_SIZE
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    @staticmethod
+    async def compress_body(
+            encoding: str,
+            body: bytes,
+            tags: Optional[Tuple[str, ...]]
+    ) -> bytes:
+        if tags is None:
+            return compress(encoding, body)
+
+        key = f'compressed:{encoding}:{hashlib.md5(body).hexdigest()}'
+
+        if (compressed := await response_cache.get(key)) is not None:
+            return compressed
+
+        compressed = compress(encoding, body)
+        await response_cache.set(key, compressed, tags=tags)
+
+        return compressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        encoding = get_response_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        start_message: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor
+
+            if message['type'] == 'http.response.start':
+                # Решение о сжатии принимается по первой части тела, до этого заголовки придерживаются
+                start_message = message
+                return
+
+            if message['type'] != 'http.response.body':
+                return await send(message)
+
+            if start_message is None:
+                if compressor is None:
+                    return await send(message)
+
+                more_body = message.get('more_body', False)
+                body = compressor.compress(message.get('body', b''))
+
+                if not more_body:
+                    body += compressor.flush()
+
+                return await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if 'content-encoding' in headers or not is_compressible(headers.get('content-type')):
+                await send(start)
+                return await send(message)
+
+            headers.add_vary_header('Accept-Encoding')
+
+            if encoding is None or (not more_body and len(body) < self.minimum_size):
+                await send(start)
+                return await send(message)
+
+            headers['Content-Encoding'] = encoding
+
+            # Сжатое представление побайтно отличается от исходного, поэтому ETag становится слабым.
+            # If-None-Match сравнивается без учета W/, поэтому 304 продолжает работать
+            if (etag := headers.get('etag')) is not None and not etag.startswith('W/'):
+                headers['ETag'] = f'W/{etag}'
+
+            if not more_body:
+                body = await self.compress_body(
+                    encoding,
+                    body,
+                    tags=scope.get(CACHE_TAGS_SCOPE_KEY) if etag is not None else None
+                )
+                headers['Content-Length'] = str(len(body))
+
+                await send(start)
+                return await send({'type': 'http.response.body', 'body': body})
+
+            if 'content-length' in headers:
+                del headers['Content-Length']
+
+            compressor = StreamCompressor(encoding)
+
+            await send(start)
+            await send({'type': 'http.response.body', 'body': compressor.compress(body), 'more_body': True})
+
+        await self.app(scope, receive, send_compressed)
@@ -6,7 +6,7 @@ from fastapi.params import Query, Body
 from starlette.responses import JSONResponse, Response
 
 from schemas.service import RequestCreate, AdditionalPath
-from schemas.responses import ResponseData, Meta, ResponseCreate
+from schemas.responses import ResponseData, FastResponseData, Meta, ResponseCreate
 from schemas import pyggy_bank as pb_schemes
 
 from database import models
@@ -17,6 +17,7 @@ from typing import Annotated, List, Optional
 from common_lib.file_storage.file_manager import file_manager
 
 from common_lib.background_tasks import insert_user_requests
+from common_lib.cache import cache_response
 
 PIGGY_BANK_GROUP_TAG = 'piggy_bank_group'
 PIGGY_BANK_KTD_TAG = 'piggy_bank_ktd'
@@ -33,6 +34,7 @@ piggy_bank_router = APIRouter(prefix='/piggy_bank', tags=['piggy_bank_methods'])
     response_model=ResponseData[pb_schemes.PiggyBankGroupResponse],
     summary='Получить группы детей'
 )
+@cache_response(tags=[models.PiggyBankGroups.__tablename__])
 async def get_groups(
     group_ids: Annotated[
         List[int],
@@ -42,14 +44,14 @@ async def get_groups(
     ] = None
 ):
 
-    groups = await CRUDManagerSQL.get_data(
+    groups = await CRUDManagerSQL.get_rows(
         model=models.PiggyBankGroups,
         row_id=group_ids
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=groups,
-        meta=Meta(total=len(groups))
+        adapter=pb_schemes.piggy_bank_group_list_adapter
     )
 
 
@@ -102,6 +104,7 @@ async def create_group(
     response_model=ResponseData[pb_schemes.PiggyBankTypeGameResponse],
     summary='Получить типы игр'
 )
+@cache_response(tags=[models.PiggyBankTypesGame.__tablename__])
 async def get_types_game(
     type_game_ids: Annotated[
         List[int],
@@ -111,14 +114,14 @@ async def get_types_game(
     ] = None
 ):
 
-    types_game = await CRUDManagerSQL.get_data(
+    types_game = await CRUDManagerSQL.get_rows(
         model=models.PiggyBankTypesGame,
         row_id=type_game_ids
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=types_game,
-        meta=Meta(total=len(types_game))
+        adapter=pb_schemes.piggy_bank_type_game_list_adapter
     )
 
 
@@ -171,6 +174,10 @@ async def create_type_game(
     response_model=ResponseData[pb_schemes.PiggyBankGameResponse],
     summary='Получить игры'
 )
+@cache_response(
+    tags=[models.PiggyBankGames.__tablename__],
+    bypass=lambda params: params['is_create_user_request'] and params['tg_user_id']
+)
 async def get_games(
     bg_task: BackgroundTasks,
     game_ids: Annotated[
@@ -192,7 +199,7 @@ async def get_games(
         )
     ] = False
 ):
-    games = await CRUDManagerSQL.get_data(
+    games = await CRUDManagerSQL.get_rows(
         model=models.PiggyBankGames,
         row_id=game_ids
     )
@@ -204,9 +211,9 @@ async def get_games(
             data=games
         )
 
-    return ResponseData(
+    return FastResponseData(
         data=games,
-        meta=Meta(total=len(games))
+        adapter=pb_schemes.piggy_bank_game_list_adapter
     )
 
 
@@ -216,6 +223,15 @@ async def get_games(
     response_model=ResponseData[pb_schemes.PiggyBankGameResponse],
     summary='Получить игры по типу игры и группе детей'
 )
+@cache_response(
+    tags=[
+        models.PiggyBankGames.__tablename__,
+        models.PiggyBankGroupForGame.__tablename__,
+        models.PiggyBankTypesGamesForGame.__tablename__,
+        models.PiggyBankGroups.__tablename__,
+        models.PiggyBankTypesGame.__tablename__
+    ]
+)
 async def get_games_by_type_group(
     type_id: Annotated[
         int,
@@ -234,9 +250,9 @@ async def get_games_by_type_group(
         group_id=group_id,
         type_id=type_id
     )
-    return ResponseData(
+    return FastResponseData(
         data=games,
-        meta=Meta(total=len(games))
+        adapter=pb_schemes.piggy_bank_game_list_adapter
     )
 
 
@@ -376,6 +392,10 @@ async def get_game_file(
     response_model=ResponseData[pb_schemes.PiggyBankBaseStructureResponse],
     summary='Получить легенды'
 )
+@cache_response(
+    tags=[models.PiggyBankLegends.__tablename__],
+    bypass=lambda params: params['is_create_user_request'] and params['tg_user_id']
+)
 async def get_legends(
     bg_task: BackgroundTasks,
     legend_ids: Annotated[
@@ -397,7 +417,7 @@ async def get_legends(
         )
     ] = False
 ):
-    legends = await CRUDManagerSQL.get_data(
+    legends = await CRUDManagerSQL.get_rows(
         model=models.PiggyBankLegends,
         row_id=legend_ids,
     )
@@ -409,9 +429,9 @@ async def get_legends(
             data=legends
         )
 
-    return ResponseData(
+    return FastResponseData(
         data=legends,
-        meta=Meta(total=len(legends))
+        adapter=pb_schemes.piggy_bank_base_structure_list_adapter
     )
 
 
@@ -421,6 +441,13 @@ async def get_legends(
     response_model=ResponseData[pb_schemes.PiggyBankBaseStructureResponse],
     summary='Получить легенды по группе детей'
 )
+@cache_response(
+    tags=[
+        models.PiggyBankLegends.__tablename__,
+        models.PiggyBankGroupsForLegend.__tablename__,
+        models.PiggyBankGroups.__tablename__
+    ]
+)
 async def get_legends_by_group(
     group_id: Annotated[
         int,
@@ -433,9 +460,9 @@ async def get_legends_by_group(
         group_id=group_id
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=legends,
-        meta=Meta(total=len(legends))
+        adapter=pb_schemes.piggy_bank_base_structure_list_adapter
     )
 
 @piggy_bank_router.post(
@@ -573,6 +600,10 @@ async def get_legend_file(
     response_model=ResponseData[pb_schemes.PiggyBankBaseStructureResponse],
     summary='Получить КТД'
 )
+@cache_response(
+    tags=[models.PiggyBankKTD.__tablename__],
+    bypass=lambda params: params['is_create_user_request'] and params['tg_user_id']
+)
 async def get_ktd_by_id(
     bg_task: BackgroundTasks,
     ktd_ids: Annotated[
@@ -595,7 +626,7 @@ async def get_ktd_by_id(
         ] = False
 ):
 
-    ktds = await CRUDManagerSQL.get_data(
+    ktds = await CRUDManagerSQL.get_rows(
         model=models.PiggyBankKTD,
         row_id=ktd_ids
     )
@@ -607,9 +638,9 @@ async def get_ktd_by_id(
             data=ktds
         )
 
-    return ResponseData(
+    return FastResponseData(
         data=ktds,
-        meta=Meta(total=len(ktds))
+        adapter=pb_schemes.piggy_bank_base_structure_list_adapter
     )
 
 
@@ -659,6 +690,13 @@ async def create_ktd(
     response_model=ResponseData[pb_schemes.PiggyBankBaseStructureResponse],
     summary='Получить КТД по группе детей'
 )
+@cache_response(
+    tags=[
+        models.PiggyBankKTD.__tablename__,
+        models.PiggyBankGroupsForKTD.__tablename__,
+        models.PiggyBankGroups.__tablename__
+    ]
+)
 async def get_ktd_by_group(
     group_id: Annotated[
         int,
@@ -671,9 +709,9 @@ async def get_ktd_by_group(
         group_id=group_id
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=ktds,
-        meta=Meta(total=len(ktds))
+        adapter=pb_schemes.piggy_bank_base_structure_list_adapter
     )
 
 
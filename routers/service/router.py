@@ -7,8 +7,8 @@ from starlette.responses import JSONResponse
 from database.models import Reviews
 from schemas import service as sc_schemes
 
-from database import models
-from database.cruds import CRUDManagerSQL
+from database.cruds import CRUDManagerSQL, ReviewCruds, TelegramUserCruds
+from database.identity_cache import identity_cache
 from schemas.responses import ResponseData, Meta
 from schemas.service import ReviewCreate, ReviewResponse
 
@@ -28,25 +28,24 @@ async def check_user(
         )]
 ) -> JSONResponse:
 
-    if len(await CRUDManagerSQL.get_data(
-            model=models.TelegramUsers,
-            row_filter={
-                'telegram_id':user.telegram_id
-            }
-    )) > 0:
+    # Повторные /start известных пользователей отвечаются без обращения к БД
+    if identity_cache.is_known_user(user.telegram_id):
         return JSONResponse(
             status_code=400,
             content={'message': 'Пользователь существует'}
         )
 
-    await CRUDManagerSQL.insert_data(
-        model=models.TelegramUsers,
-        body={
-            'telegram_id':user.telegram_id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'nickname': user.nickname
-        }
+    if (user_id := await TelegramUserCruds.insert_user_if_not_exists(user=user)) is None:
+        identity_cache.add_known_user(user.telegram_id)
+
+        return JSONResponse(
+            status_code=400,
+            content={'message': 'Пользователь существует'}
+        )
+
+    identity_cache.set_user_id(
+        telegram_id=user.telegram_id,
+        user_id=user_id
     )
 
     return JSONResponse(
@@ -123,30 +122,30 @@ async def insert_review(
 )
 async def get_all_reviews(
         is_only_new: Annotated[bool, Query(
-            description="Получить только новые отзывы."
-        )] = False
+            description="Получить только новые отзывы. Полученные отзывы помечаются просмотренными."
+        )] = False,
+        limit: Annotated[int, Query(
+            description="Количество отзывов",
+            ge=1,
+            le=500
+        )] = 50,
+        offset: Annotated[int, Query(
+            description="Смещение, не используется для новых отзывов",
+            ge=0
+        )] = 0
 ):
 
-    row_filter = {
-        'looked_status': 0
-    } if not is_only_new else None
-
-    reviews = await CRUDManagerSQL.get_data(
-        model=Reviews,
-        row_filter=row_filter
-    )
-
     if is_only_new:
-        for review in reviews:
-            await CRUDManagerSQL.update_data(
-                model=Reviews,
-                row_id=review.id,
-                body={
-                    'looked_status': 1
-                }
-            )
+        reviews = await ReviewCruds.claim_new_reviews(limit=limit)
+        total = len(reviews)
+
+    else:
+        total, reviews = await ReviewCruds.get_reviews(
+            limit=limit,
+            offset=offset
+        )
 
     return ResponseData(
         data=reviews,
-        meta=Meta(total=len(reviews))
+        meta=Meta(total=total)
     )
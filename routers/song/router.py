@@ -8,9 +8,10 @@ from database import models
 from database.cruds import CRUDManagerSQL, SongCruds
 
 from typing import List, Optional, Annotated
-from schemas.responses import ResponseData, Meta, ResponseDelete, ResponseCreate
+from schemas.responses import ResponseData, FastResponseData, Meta, ResponseDelete, ResponseCreate
 
 from common_lib.background_tasks import insert_user_requests
+from common_lib.cache import cache_response
 
 SONG_CATEGORY_TAG = 'song_category'
 SONG_TAG = 'song'
@@ -66,6 +67,10 @@ async def insert_song(
     response_model=ResponseData[song_schemes.SongResponse],
     summary='Получить песни'
 )
+@cache_response(
+    tags=[models.Songs.__tablename__, models.CategorySong.__tablename__],
+    bypass=lambda params: params['is_create_user_request'] and params['tg_user_id']
+)
 async def get_songs(
     bg_task: BackgroundTasks,
     song_ids: Annotated[
@@ -96,7 +101,7 @@ async def get_songs(
 
     row_filter = {"category": category_id} if category_id else None
 
-    songs = await CRUDManagerSQL.get_data(
+    songs = await CRUDManagerSQL.get_rows(
         model=models.Songs,
         row_id=song_ids,
         row_filter=row_filter
@@ -109,9 +114,34 @@ async def get_songs(
             data=songs
         )
 
-    return ResponseData(
+    return FastResponseData(
         data=songs,
-        meta=Meta(total=len(songs))
+        adapter=song_schemes.song_list_adapter
+    )
+
+@song_router.get(
+    path='/by_category/',
+    tags=[SONG_TAG],
+    response_model=ResponseData[song_schemes.SongsByCategoryResponse],
+    summary='Получить песни, сгруппированные по категориям'
+)
+@cache_response(tags=[models.Songs.__tablename__, models.CategorySong.__tablename__])
+async def get_songs_by_category(
+    is_short: Annotated[
+        bool,
+        Query(
+            description="Вернуть у песен только id, название и категорию"
+        )
+    ] = False
+):
+
+    categories = await SongCruds.get_all_songs_by_category(
+        is_short=is_short
+    )
+
+    return ResponseData(
+        data=categories,
+        meta=Meta(total=len(categories))
     )
 
 @song_router.get(
@@ -120,6 +150,7 @@ async def get_songs(
     response_model=ResponseData[song_schemes.SongResponse],
     summary='Поиск песен по названию'
 )
+@cache_response(tags=[models.Songs.__tablename__])
 async def search_songs_by_title(
     title_song: Annotated[
         str,
@@ -133,9 +164,9 @@ async def search_songs_by_title(
         title_song=title_song
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=songs,
-        meta=Meta(total=len(songs))
+        adapter=song_schemes.song_list_adapter
     )
 
 
@@ -197,6 +228,7 @@ async def delete_song_by_id(
     response_model=ResponseData[song_schemes.CategorySongResponse],
     summary='Получить категории песен'
 )
+@cache_response(tags=[models.CategorySong.__tablename__])
 async def get_categories(
     category_ids: Annotated[
         List[int],
@@ -213,15 +245,15 @@ async def get_categories(
 ):
     row_filter = {"parent_id": None} if only_parents else {}
 
-    categories = await CRUDManagerSQL.get_data(
+    categories = await CRUDManagerSQL.get_rows(
         model=models.CategorySong,
         row_id=category_ids,
         row_filter=row_filter
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=categories,
-        meta=Meta(total=len(categories))
+        adapter=song_schemes.category_song_list_adapter
     )
 
 @song_router.get(
@@ -230,6 +262,7 @@ async def get_categories(
     response_model=ResponseData[song_schemes.CategorySongResponse],
     summary='Получить дочерние категории категорий'
 )
+@cache_response(tags=[models.CategorySong.__tablename__])
 async def get_childs_categories(
         id_category: Annotated[
             int,
@@ -239,16 +272,42 @@ async def get_childs_categories(
         ] = None
 ):
 
-    categories = await CRUDManagerSQL.get_data(
+    categories = await CRUDManagerSQL.get_rows(
         model=models.CategorySong,
         row_filter={
             'parent_id': id_category
         }
     )
 
-    return ResponseData(
+    return FastResponseData(
         data=categories,
-        meta=Meta(total=len(categories))
+        adapter=song_schemes.category_song_list_adapter
+    )
+
+
+@song_router.get(
+    path='/categories/tree/',
+    tags=[SONG_CATEGORY_TAG],
+    response_model=ResponseData[song_schemes.CategorySongTreeResponse],
+    summary='Получить дерево категорий песен'
+)
+@cache_response(tags=[models.CategorySong.__tablename__, models.Songs.__tablename__])
+async def get_categories_tree(
+        with_songs_count: Annotated[
+            bool,
+            Query(
+                description="Добавить к каждой категории количество песен в ней"
+            )
+        ] = False
+):
+
+    tree = await SongCruds.get_category_tree(
+        with_songs_count=with_songs_count
+    )
+
+    return ResponseData(
+        data=tree,
+        meta=Meta(total=len(tree))
     )
 
 
@@ -327,9 +386,8 @@ async def delete_category(
         ]
 ):
 
-    deleted_ids = await CRUDManagerSQL.delete_data(
-            model=models.CategorySong,
-            row_id=category_ids
+    deleted_ids = await SongCruds.delete_categories(
+        category_ids=category_ids
     )
 
     return ResponseDelete(
@@ -24,17 +24,10 @@ async def get_song_events(
     )] = False
 ):
 
-    data = await SongEventCruds.get_song_event(
+    song_events = await SongEventCruds.get_song_event(
         row_id=row_ids,
         is_actual=is_actual
     )
-    song_events = []
-    for song_event in data:
-        song_ids = [song.song_id for song in song_event.rel_songs]
-
-        song_event = song_event.to_dict()
-        song_event['song_ids'] = song_ids
-        song_events.append(song_event)
 
     return ResponseData(
         data=song_events,
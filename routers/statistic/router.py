@@ -1,14 +1,17 @@
 import urllib
+from datetime import date, timedelta
 from typing import List, Annotated, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi.params import Query
 
 from io import BytesIO
 from common_lib.api_clients.grafana_client import grafana_client
 from fastapi.responses import FileResponse, Response
 
+from database.cruds import StatisticCruds
 from schemas.dashboard import Dashboard, Visualization
+from schemas.service import TopContentResponse
 from schemas.responses import ResponseData, Meta
 
 statistic_router = APIRouter(prefix='/statistic', tags=['statistic'])
@@ -105,4 +108,50 @@ async def get_dashboard_img(
             'file_type': '.png',
             'filename': filename
         }
-    )
\ No newline at end of file
+    )
+
+
+@statistic_router.get(
+    path='/top/',
+    response_model=ResponseData[TopContentResponse],
+    summary='Получить самый популярный контент'
+)
+async def get_top_content(
+        request_type: Annotated[str, Query(
+            description="Название типа запроса"
+        )],
+        days: Annotated[int, Query(
+            description="Количество последних дней, за которые считается топ",
+            ge=1,
+            le=366
+        )] = 30,
+        date_to: Annotated[Optional[date], Query(
+            description="Последний день периода, по умолчанию сегодня"
+        )] = None,
+        limit: Annotated[int, Query(
+            description="Количество записей в топе",
+            ge=1,
+            le=100
+        )] = 10
+):
+    date_to = date_to or date.today()
+
+    try:
+        date_from = date_to - timedelta(days=days - 1)
+    except OverflowError:
+        raise HTTPException(
+            status_code=422,
+            detail='Период выходит за допустимый диапазон дат'
+        )
+
+    top_content = await StatisticCruds.get_top_content(
+        request_type_title=request_type,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit
+    )
+
+    return ResponseData(
+        data=top_content,
+        meta=Meta(total=len(top_content))
+    )
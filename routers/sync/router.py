@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Query
+
+from database.cruds import SyncCruds
+from schemas.sync import SyncChangesResponse
+
+sync_router = APIRouter(prefix='/sync', tags=['sync'])
+
+
+@sync_router.get(
+    path='/changes/',
+    response_model=SyncChangesResponse,
+    summary='Получить изменения каталога с момента since'
+)
+async def get_changes(
+        since: Annotated[Optional[datetime], Query(
+            description="Курсор из предыдущего ответа. Если не передан, возвращается весь каталог"
+        )] = None
+):
+    return await SyncCruds.get_changes(
+        since=since
+    )
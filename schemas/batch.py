@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field, field_validator
+
+import config
+
+QueryParamValue = Union[str, int, float, bool, List[Union[str, int, float, bool]]]
+
+
+class BatchQuery(BaseModel):
+    """
+    Подзапрос пакета: GET запрос к эндпоинту чтения с параметрами строки запроса
+    """
+    name: str = Field(description='Имя подзапроса, под ним возвращается результат')
+    path: str = Field(description='Путь эндпоинта чтения, например /songs/categories/')
+    params: Dict[str, QueryParamValue] = {}
+
+
+class BatchRequest(BaseModel):
+    queries: List[BatchQuery] = Field(min_length=1, max_length=config.BATCH_MAX_QUERIES)
+
+    @field_validator('queries')
+    @classmethod
+    def check_unique_names(cls, queries: List[BatchQuery]) -> List[BatchQuery]:
+        names = [query.name for query in queries]
+
+        if len(names) != len(set(names)):
+            raise ValueError('Имена подзапросов должны быть уникальными')
+
+        return queries
+
+
+class BatchResult(BaseModel):
+    """
+    Результат подзапроса: status - HTTP статус эндпоинта,
+    data - тело успешного ответа, error - тело ответа с ошибкой
+    """
+    status: int
+    data: Optional[Any] = None
+    error: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    results: Dict[str, BatchResult]
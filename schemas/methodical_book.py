@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class MethodicalChapterCreate(BaseModel):
@@ -31,4 +33,38 @@ class MethodicalChaptersResponse(MethodicalChapterCreate):
                 "file_path": "/path/to/file.pdf"
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+class MethodicalChapterTreeResponse(BaseModel):
+
+    id: int
+    parent_id: int | None = None
+    title: str
+    has_file: bool
+    childrens: list['MethodicalChapterTreeResponse'] = []
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "parent_id": None,
+                "title": "Глава 1",
+                "has_file": False,
+                "childrens": [
+                    {
+                        "id": 2,
+                        "parent_id": 1,
+                        "title": "Глава 1.1",
+                        "has_file": True,
+                        "childrens": []
+                    }
+                ]
+            }
+        }
+    )
+
+
+# Заранее собранный адаптер для FastResponseData, см. schemas/responses.py
+methodical_chapter_list_adapter = TypeAdapter(List[MethodicalChaptersResponse])
@@ -1,6 +1,6 @@
 from typing import Union, List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class PiggyBankGroupCreate(BaseModel):
@@ -152,4 +152,11 @@ class IntersectionGroupTypeIds(BaseModel):
                 "type_ids": [1]
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+# Заранее собранные адаптеры для FastResponseData, см. schemas/responses.py
+piggy_bank_group_list_adapter = TypeAdapter(List[PiggyBankGroupResponse])
+piggy_bank_type_game_list_adapter = TypeAdapter(List[PiggyBankTypeGameResponse])
+piggy_bank_game_list_adapter = TypeAdapter(List[PiggyBankGameResponse])
+piggy_bank_base_structure_list_adapter = TypeAdapter(List[PiggyBankBaseStructureResponse])
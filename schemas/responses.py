@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import List, TypeVar, Generic, Optional, Union
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+from typing import Any, Dict, List, TypeVar, Generic, Optional, Union
 
 T = TypeVar("T")
 
@@ -34,4 +36,42 @@ class ResponseDelete(BaseModel):
     """
     message: Optional[str] = 'Запись успешно удалена'
     deleted_ids: Optional[List[int]] = None
-    meta: Optional[Meta] = None
\ No newline at end of file
+    meta: Optional[Meta] = None
+
+
+def serialize_model(value: Any) -> Dict[str, Any]:
+    """
+    default для orjson: проверенная модель схемы отдается словарем своих полей, значения orjson сериализует сам
+    """
+    if isinstance(value, BaseModel):
+        return value.__dict__
+
+    raise TypeError(f'Тип {type(value).__name__} не сериализуется в JSON')
+
+
+class FastResponseData(Response):
+    """
+    Ответ в формате ResponseData, сериализованный через orjson.
+    Строки проверяются заранее собранным TypeAdapter схемы (from_attributes) один раз,
+    проверенные модели orjson сериализует сам (даты и вложенные модели), без промежуточного dump_python.
+    Эндпоинт возвращает готовый Response, поэтому FastAPI не проверяет его повторно по response_model
+    и не прогоняет через jsonable_encoder. response_model у маршрута остается для документации
+    """
+    media_type = 'application/json'
+
+    def __init__(
+            self,
+            data: Any,
+            adapter: TypeAdapter,
+            message: Optional[str] = None,
+            **kwargs
+    ):
+        rows = adapter.validate_python(data, from_attributes=True)
+
+        super().__init__(
+            content={'data': rows, 'message': message, 'meta': {'total': len(rows)}},
+            **kwargs
+        )
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=serialize_model)
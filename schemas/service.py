@@ -21,6 +21,12 @@ class RequestCreate(BaseModel):
     content_display_value: str
 
 
+class TopContentResponse(BaseModel):
+    id_content: int
+    content_display_value: Optional[str] = None
+    count: int
+
+
 class FileResponse(BaseModel):
     filename: str
     suffix: str
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class SongCreate(BaseModel):
@@ -90,6 +92,37 @@ class CategorySongResponse(CategorySongCreate):
     )
 
 
+class CategorySongTreeResponse(CategorySongResponse):
+
+    """
+    Узел дерева категорий
+    """
+
+    songs_count: int | None = None
+    childrens: list['CategorySongTreeResponse'] = []
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "name": "Песни ИО СПО",
+                "parent_id": None,
+                "songs_count": 0,
+                "childrens": [
+                    {
+                        "id": 2,
+                        "name": "Песни ИО СПО (Авторские)",
+                        "parent_id": 1,
+                        "songs_count": 12,
+                        "childrens": []
+                    }
+                ]
+            }
+        }
+    )
+
+
 class SongSearch(BaseModel):
 
     telegram_id: int = 1
@@ -106,6 +139,32 @@ class SongSearch(BaseModel):
     )
 
 
+class SongShortResponse(BaseModel):
+
+    """
+    Сокращенная модель песни для меню
+    """
+
+    id: int
+    title: str
+    category: int | None = None
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": 1,
+                "title": "Ангел света",
+                "category": 1
+            }
+        }
+    )
+
+
 class SongsByCategoryResponse(CategorySongResponse):
-    rel_songs: list[SongResponse]
+    rel_songs: list[SongResponse | SongShortResponse]
+
 
+# Заранее собранные адаптеры для FastResponseData, см. schemas/responses.py
+song_list_adapter = TypeAdapter(List[SongResponse])
+category_song_list_adapter = TypeAdapter(List[CategorySongResponse])
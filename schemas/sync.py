@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+
+class TableChanges(BaseModel):
+    created: List[Dict[str, Any]] = []
+    updated: List[Dict[str, Any]] = []
+    deleted: List[int] = []
+
+
+class SyncChangesResponse(BaseModel):
+    """
+    Изменения каталога с момента since.
+    cursor передается в since следующего запроса
+    """
+    cursor: datetime
+    changes: Dict[str, TableChanges]
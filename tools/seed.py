@@ -0,0 +1,89 @@
+"""
+Наполнение локальной БД синтетическими данными для проверок производительности.
+Все таблицы пересоздаются, поэтому использовать только на тестовой БД.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import REQUESTS_PARTITIONS_MONTHS_AHEAD
+from database.models import Base
+from database.requests_partitions import add_months, get_create_partition_sql
+
+GROUPS_COUNT = 100
+TYPES_GAME_COUNT = 50
+LINKS_PER_ROW = 2
+SONGS_PER_EVENT = 5
+
+
+def get_seed_statements(
+        rows: int
+) -> list[str]:
+    categories = max(rows // 20, 1)
+    events = max(rows // 10, 1)
+
+    return [
+        f'''INSERT INTO "PiggyBankGroups"(title) SELECT 'Группа ' || i FROM generate_series(1, {GROUPS_COUNT}) i''',
+        f'''INSERT INTO "PiggyBankTypesGame"(title) SELECT 'Тип ' || i FROM generate_series(1, {TYPES_GAME_COUNT}) i''',
+
+        f'''INSERT INTO "PiggyBankGames"(title, description) SELECT 'Игра ' || i, 'Описание ' || i FROM generate_series(1, {rows}) i''',
+        f'''INSERT INTO "PiggyBankGroupForGame"(game_id, group_id)
+            SELECT i, (i + j) % {GROUPS_COUNT} + 1 FROM generate_series(1, {rows}) i, generate_series(1, {LINKS_PER_ROW}) j''',
+        f'''INSERT INTO "PiggyBankTypesGamesForGame"(game_id, type_id)
+            SELECT i, (i * 7 + j) % {TYPES_GAME_COUNT} + 1 FROM generate_series(1, {rows}) i, generate_series(1, {LINKS_PER_ROW}) j''',
+
+        f'''INSERT INTO "PiggyBankLegends"(title, description) SELECT 'Легенда ' || i, 'Описание ' || i FROM generate_series(1, {rows}) i''',
+        f'''INSERT INTO "PiggyBankGroupsForLegend"(legend_id, group_id)
+            SELECT i, (i + j) % {GROUPS_COUNT} + 1 FROM generate_series(1, {rows}) i, generate_series(1, {LINKS_PER_ROW}) j''',
+
+        f'''INSERT INTO "PiggyBankKTD"(title, description) SELECT 'КТД ' || i, 'Описание ' || i FROM generate_series(1, {rows}) i''',
+        f'''INSERT INTO "PiggyBankGroupsForKTD"(ktd_id, group_id)
+            SELECT i, (i + j) % {GROUPS_COUNT} + 1 FROM generate_series(1, {rows}) i, generate_series(1, {LINKS_PER_ROW}) j''',
+
+        f'''INSERT INTO "CategorySong"(name, parent_id)
+            SELECT 'Категория ' || i, CASE WHEN i <= 5 THEN NULL ELSE (i % 5) + 1 END FROM generate_series(1, {categories}) i''',
+        f'''INSERT INTO "Songs"(title, title_search, text, category)
+            SELECT 'Песня ' || i, 'песня' || i, repeat('Текст песни ', 50), i % {categories} + 1 FROM generate_series(1, {rows}) i''',
+
+        # Почти все события уже завершились, актуальных - единицы, как и в реальных данных
+        f'''INSERT INTO "SongEvents"(title, start_dt, end_dt, duration)
+            SELECT 'Событие ' || i, current_date - ({events} - i + 7), current_date - ({events} - i) + 1, 7
+            FROM generate_series(1, {events}) i''',
+        f'''INSERT INTO "SongsForSongsEvent"(event_id, song_id)
+            SELECT i, (i * {SONGS_PER_EVENT} + j) % {rows} + 1 FROM generate_series(1, {events}) i, generate_series(1, {SONGS_PER_EVENT}) j''',
+
+        '''INSERT INTO "RequestTypes"(title) VALUES ('Игра'), ('Песня'), ('Легенда'), ('КТД')''',
+        f'''INSERT INTO "TelegramUsers"(telegram_id, nickname) SELECT 100000 + i, 'user' || i FROM generate_series(1, {rows}) i''',
+        f'''INSERT INTO "Requests"(id_user, id_request_type, id_content, content_display_value)
+            SELECT i % {rows} + 1, i % 4 + 1, i % {rows} + 1, 'Контент ' || i FROM generate_series(1, {rows} * 5) i''',
+        f'''INSERT INTO "Reviews"(id_user, text_review, looked_status, created_data)
+            SELECT 100000 + i % {rows} + 1, 'Отзыв ' || i, CASE WHEN i % 50 = 0 THEN 0 ELSE 1 END, now() FROM generate_series(1, 1000) i''',
+        f'''INSERT INTO "MethodicalBookChapters"(title, parent_id)
+            SELECT 'Глава ' || i, CASE WHEN i <= 10 THEN NULL ELSE (i % 10) + 1 END FROM generate_series(1, {categories}) i''',
+    ]
+
+
+async def seed_database(
+        engine: AsyncEngine,
+        rows: int
+) -> None:
+    """
+    Пересоздает таблицы по моделям и наполняет их примерно rows записями на основную сущность
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+        # Секции Requests создаются до записи запросов, как при старте приложения,
+        # иначе строки попадут в секцию по умолчанию и обслуживание секций не сможет создать месяц
+        current_month = (await connection.scalar(text('SELECT current_date'))).replace(day=1)
+
+        for months in range(REQUESTS_PARTITIONS_MONTHS_AHEAD + 1):
+            await connection.execute(text(get_create_partition_sql(add_months(current_month, months))))
+
+        for statement in get_seed_statements(rows):
+            await connection.execute(text(statement))
+
+    # ANALYZE нельзя выполнять внутри транзакции вместе с DDL, поэтому отдельным соединением
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level='AUTOCOMMIT')
+        await connection.execute(text('ANALYZE'))